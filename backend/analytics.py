@@ -0,0 +1,131 @@
+"""Precomputed rollups for the admin dashboards.
+
+Three summary tables hold the counts the dashboards show: certificates
+per issuer, internships per company and projects per student per month.
+The create and delete handlers call ``record_created`` and
+``record_deleted`` inside their own transaction, so a rollup changes
+together with the rows it counts. Reading the stats never touches the
+record tables.
+
+``rebuild`` recomputes every rollup from scratch with one GROUP BY per
+table. Use it after loading data behind the API's back or if the
+rollups are ever in doubt.
+"""
+from collections import Counter
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, bindparam, delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+metadata = MetaData()
+
+certificate_issuers = Table(
+    'stats_certificate_issuers', metadata,
+    Column('issuer', String(100), primary_key=True),
+    Column('count', Integer, nullable=False, default=0),
+)
+internship_companies = Table(
+    'stats_internship_companies', metadata,
+    Column('company', String(100), primary_key=True),
+    Column('count', Integer, nullable=False, default=0),
+)
+project_months = Table(
+    'stats_project_months', metadata,
+    Column('user_id', Integer, primary_key=True),
+    Column('month', String(7), primary_key=True),
+    Column('count', Integer, nullable=False, default=0),
+)
+
+def project_month(start_date):
+    """The YYYY-MM a project is counted under."""
+    return (start_date or '')[:7]
+
+# collection -> (rollup table, function giving a record's rollup key)
+ROLLUPS = {
+    'certificates': (certificate_issuers, lambda r: {'issuer': r['issuer']}),
+    'internships': (internship_companies, lambda r: {'company': r['company']}),
+    'projects': (project_months, lambda r: {'user_id': r['user_id'], 'month': project_month(r['start_date'])}),
+}
+
+def _upsert_insert(connection):
+    if connection.dialect.name == 'postgresql':
+        return postgresql_insert
+    return sqlite_insert
+
+def _apply(connection, collection, records, sign):
+    table, key_of = ROLLUPS[collection]
+    deltas = Counter()
+    for record in records:
+        deltas[tuple(sorted(key_of(record).items()))] += sign
+    if not deltas:
+        return
+
+    insert = _upsert_insert(connection)
+    key_columns = [c.name for c in table.primary_key.columns]
+    rows = [dict(key, count=delta) for key, delta in deltas.items()]
+    statement = insert(table)
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={'count': table.c.count + statement.excluded.count}
+        ),
+        rows
+    )
+    if sign < 0:
+        # Only the keys just decremented can have dropped to zero; one
+        # primary-key lookup each rather than a scan of the whole rollup
+        cleanup = delete(table).where(
+            *[table.c[name] == bindparam(f'key_{name}') for name in key_columns],
+            table.c.count <= 0
+        )
+        connection.execute(cleanup, [{f'key_{name}': value for name, value in key} for key in deltas])
+
+def record_created(connection, collection, records):
+    """Count new records; ``records`` are dicts of the records' column values."""
+    _apply(connection, collection, records, 1)
+
+def record_deleted(connection, collection, records):
+    """Uncount deleted records; ``records`` are dicts of the records' column values."""
+    _apply(connection, collection, records, -1)
+
+def rebuild(connection):
+    """Recompute every rollup from the record tables in one pass per table."""
+    for table in metadata.sorted_tables:
+        connection.execute(delete(table))
+    connection.execute(text(
+        "INSERT INTO stats_certificate_issuers (issuer, count) "
+        "SELECT issuer, COUNT(*) FROM certificates GROUP BY issuer"))
+    connection.execute(text(
+        "INSERT INTO stats_internship_companies (company, count) "
+        "SELECT company, COUNT(*) FROM internships GROUP BY company"))
+    connection.execute(text(
+        "INSERT INTO stats_project_months (user_id, month, count) "
+        "SELECT user_id, substr(start_date, 1, 7), COUNT(*) FROM projects "
+        "GROUP BY user_id, substr(start_date, 1, 7)"))
+
+def get_stats(connection, user_id=None, limit=None):
+    """Return the rollups, largest counts first.
+
+    ``user_id`` restricts the per-month project counts to one student;
+    ``limit`` caps each list.
+    """
+    def rows(query):
+        if limit:
+            query = query.limit(limit)
+        return [dict(row._mapping) for row in connection.execute(query)]
+
+    projects = select(project_months).order_by(project_months.c.user_id, project_months.c.month)
+    if user_id is not None:
+        projects = projects.where(project_months.c.user_id == user_id)
+    return {
+        'certificates_by_issuer': rows(select(certificate_issuers).order_by(
+            certificate_issuers.c.count.desc(), certificate_issuers.c.issuer)),
+        'internships_by_company': rows(select(internship_companies).order_by(
+            internship_companies.c.count.desc(), internship_companies.c.company)),
+        'projects_by_month': rows(projects),
+        'totals': {
+            'certificates': connection.execute(select(func.coalesce(func.sum(certificate_issuers.c.count), 0))).scalar(),
+            'internships': connection.execute(select(func.coalesce(func.sum(internship_companies.c.count), 0))).scalar(),
+            'projects': connection.execute(select(func.coalesce(func.sum(project_months.c.count), 0))).scalar(),
+        }
+    }
@@ -1,27 +1,87 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, make_response, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.http import is_resource_modified
+from werkzeug.middleware.proxy_fix import ProxyFix
+import click
+from sqlalchemy import and_, event, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
 import os
+import csv
+import hashlib
+import math
+import io
 import logging
-from datetime import datetime
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+import analytics
+import jobs
+import metrics
+import migrations
+import passwords
+import ratelimit
+import search
+import serializers
+import tombstones
+from cache import ALL_USERS, create_cache
+from config import Config
+from logging_config import SAMPLED, setup_logging
+from tokens import TokenManager
+
+# Configure logging (see logging_config.py)
+setup_logging(
+    level=Config.LOG_LEVEL,
+    fmt=Config.LOG_FORMAT,
+    use_queue=Config.LOG_QUEUE,
+    sample_every=Config.LOG_SAMPLE_EVERY
 )
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Next-After-Id'])
 
-# Configure SQLite database
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///svu_student_hub.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = os.urandom(24)
+# Configure the database (see config.py for the environment variables)
+app.config.from_object(Config)
 db = SQLAlchemy(app)
 
+@event.listens_for(Engine, 'connect')
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Tune every new SQLite connection for concurrent readers and writers.
+
+    WAL lets readers proceed while a write is in progress, busy_timeout
+    makes writers wait for the lock instead of failing with "database is
+    locked", and synchronous=NORMAL is durable in WAL mode while avoiding
+    an fsync on every commit.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    cursor.execute(f"PRAGMA journal_mode = {app.config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA synchronous = {app.config['SQLITE_SYNCHRONOUS']}")
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.close()
+
+passwords.configure(
+    method=app.config['PASSWORD_HASH_METHOD'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+    timeout=app.config['PASSWORD_HASH_TIMEOUT']
+)
+token_manager = TokenManager(app.config['SECRET_KEY'], app.config['TOKEN_MAX_AGE'], app.config['TOKEN_CACHE_SIZE'])
+response_cache = create_cache(app.config['CACHE_URL'], app.config['CACHE_TTL'], app.config['CACHE_MAX_ENTRIES'])
+if app.config['PROXY_COUNT']:
+    # Take the client address from X-Forwarded-For so rate limits apply per client, not per proxy
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_COUNT'])
+rate_limiter = ratelimit.create_limiter(app.config['RATELIMIT_URL'], app.config['RATELIMIT_MAX_KEYS'])
+request_metrics = metrics.Metrics()
+if app.config['METRICS_ENABLED']:
+    metrics.init_app(app, request_metrics, app.config['PROFILE_SLOW_REQUESTS_MS'])
+
 # Database Models
 class User(db.Model):
     __tablename__ = 'users'  # Explicitly set table name
@@ -39,20 +99,29 @@ class User(db.Model):
     internships = db.relationship('Internship', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify_password(self.password_hash, password)
+
+    def to_summary(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'role': self.role,
+            'name': self.name
+        }
 
 class Certificate(db.Model):
     __tablename__ = 'certificates'  # Explicitly set table name
+    FIELDS = ('title', 'issuer', 'date_issued', 'user_id')
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    issuer = db.Column(db.String(100), nullable=False)
-    date_issued = db.Column(db.String(20), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    issuer = db.Column(db.String(100), nullable=False, index=True)
+    date_issued = db.Column(db.String(20), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def validate(self):
         if not self.title or len(self.title) > 100:
@@ -64,16 +133,31 @@ class Certificate(db.Model):
         if not self.user_id:
             raise ValueError("User ID is required")
 
+    def to_dict(self, include_user=True):
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'issuer': self.issuer,
+            'date_issued': self.date_issued,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+        if include_user:
+            data['user'] = self.user.to_summary() if self.user else None
+        return data
+
 class Project(db.Model):
     __tablename__ = 'projects'
+    FIELDS = ('title', 'description', 'start_date', 'end_date', 'user_id')
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    start_date = db.Column(db.String(20), nullable=False)
+    start_date = db.Column(db.String(20), nullable=False, index=True)
     end_date = db.Column(db.String(20), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def validate(self):
         if not self.title or len(self.title) > 100:
@@ -87,17 +171,33 @@ class Project(db.Model):
         if not self.user_id:
             raise ValueError("User ID is required")
 
+    def to_dict(self, include_user=True):
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+        if include_user:
+            data['user'] = self.user.to_summary() if self.user else None
+        return data
+
 class Internship(db.Model):
     __tablename__ = 'internships'
+    FIELDS = ('company', 'position', 'description', 'start_date', 'end_date', 'user_id')
     id = db.Column(db.Integer, primary_key=True)
-    company = db.Column(db.String(100), nullable=False)
+    company = db.Column(db.String(100), nullable=False, index=True)
     position = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    start_date = db.Column(db.String(20), nullable=False)
+    start_date = db.Column(db.String(20), nullable=False, index=True)
     end_date = db.Column(db.String(20), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def validate(self):
         if not self.company or len(self.company) > 100:
@@ -113,34 +213,911 @@ class Internship(db.Model):
         if not self.user_id:
             raise ValueError("User ID is required")
 
+    def to_dict(self, include_user=True):
+        data = {
+            'id': self.id,
+            'company': self.company,
+            'position': self.position,
+            'description': self.description,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+        if include_user:
+            data['user'] = self.user.to_summary() if self.user else None
+        return data
+
+# Column-tuple serializers for the list and portfolio endpoints (see serializers.py)
+serializers.configure(app.config['JSON_BACKEND'])
+
+def record_fields(model):
+    """The fields of ``model.to_dict()``, in the same order."""
+    return ('id',) + model.FIELDS + ('created_at', 'updated_at')
+
+LIST_SERIALIZERS = {
+    model: serializers.RowSerializer(model, record_fields(model), user_model=User)
+    for model in (Certificate, Project, Internship)
+}
+PORTFOLIO_SERIALIZERS = {
+    model: serializers.RowSerializer(model, record_fields(model))
+    for model in (Certificate, Project, Internship)
+}
+
+COLLECTIONS = {model.__tablename__: model for model in (Certificate, Project, Internship)}
+
+def json_response(data):
+    return Response(serializers.dumps(data), mimetype='application/json')
+
 # Create database tables
-def init_db():
+DEFAULT_USERS = [
+    {'username': 'administrator1', 'role': 'admin', 'name': 'Administrator', 'password': 'password123'},
+    {'username': 'rishil', 'role': 'teacher', 'name': 'Rishil', 'password': 'password123'},
+]
+SCHEMA_UPGRADE_ATTEMPTS = 3
+
+def upgrade_schema():
+    """Apply pending migrations, tolerating other workers doing the same."""
+    for attempt in range(1, SCHEMA_UPGRADE_ATTEMPTS + 1):
+        try:
+            return migrations.upgrade(db.engine, db.metadata)
+        except (IntegrityError, OperationalError) as e:
+            # Another process applied the same migration (or held the write
+            # lock) first; re-read the migration history and try again.
+            if attempt == SCHEMA_UPGRADE_ATTEMPTS:
+                raise
+            logger.warning("Schema upgrade attempt %s failed, retrying: %s", attempt, e)
+            time.sleep(0.1 * attempt)
+
+def create_default_users():
+    """Create the default accounts that do not exist yet.
+
+    Passwords are only hashed for missing accounts, so this is cheap once
+    the database has been initialized.
+    """
+    usernames = [u['username'] for u in DEFAULT_USERS]
+    existing = set(db.session.execute(
+        db.select(User.username).where(User.username.in_(usernames))).scalars())
+    missing = [u for u in DEFAULT_USERS if u['username'] not in existing]
+    if not missing:
+        return 0
+
+    logger.info("Creating default users...")
+    for user_data in missing:
+        user = User(username=user_data['username'], role=user_data['role'], name=user_data['name'])
+        user.set_password(user_data['password'])
+        db.session.add(user)
+    try:
+        db.session.commit()
+        logger.info("Default users created successfully")
+    except IntegrityError:
+        # Created concurrently by another worker
+        db.session.rollback()
+        return 0
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error initializing database: %s", e)
+        raise
+    return len(missing)
+
+def init_db(reset=False):
+    """Bring the database schema up to date and create the default users.
+
+    Safe to run on every start: existing tables and data are left alone
+    unless ``reset`` is given, which drops everything first.
+    """
     with app.app_context():
-        # Drop all tables and recreate them
-        db.drop_all()
-        db.create_all()
-        
-        logger.info("Creating default users...")
-        # Create default admin user
-        admin = User(username='administrator1', role='admin', name='Administrator')
-        admin.set_password('password123')
-        db.session.add(admin)
-
-        # Create default teacher
-        teacher = User(username='rishil', role='teacher', name='Rishil')
-        teacher.set_password('password123')
-        db.session.add(teacher)
+        if reset:
+            logger.warning("Dropping all tables")
+            migrations.reset(db.engine, db.metadata)
+            if response_cache is not None:
+                response_cache.clear()
+        upgrade_schema()
+        create_default_users()
 
+@app.cli.command('rebuild-search')
+def rebuild_search_command():
+    """Rebuild the full-text search index from the record tables."""
+    with db.engine.begin() as connection:
+        if not search.is_available(connection):
+            raise click.ClickException('Search is only available with SQLite')
+        search.rebuild_search_index(connection)
+    click.echo('Search index rebuilt.')
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the analytics rollups from the record tables."""
+    with db.engine.begin() as connection:
+        analytics.rebuild(connection)
+    click.echo('Analytics rollups rebuilt.')
+
+@app.cli.command('init-db')
+@click.option('--reset', is_flag=True, help='Drop all tables and data before initializing.')
+@click.option('--sample-data', is_flag=True,
+              help='Replace all data with the sample users and records from init_db.py; requires --reset.')
+def init_db_command(reset, sample_data):
+    """Create or upgrade the database schema and the default users."""
+    if sample_data and not reset:
+        raise click.UsageError('--sample-data drops all existing data; pass --reset as well to confirm.')
+    if sample_data:
+        import init_db as sample
+        sample.init_db()
+    else:
+        init_db(reset=reset)
+    click.echo('Database initialized.')
+
+# Create any missing tables and default users; existing data is kept
+if os.environ.get('SVU_SKIP_DB_INIT') != '1':
+    init_db()
+
+# Pagination and filtering for the list endpoints
+DEFAULT_SORT = 'id'
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = 'X-Next-After-Id'
+# Delta sync hands out a server_time this far in the past, so rows written
+# by transactions still in flight are sent again next time rather than missed
+SYNC_OVERLAP = timedelta(seconds=5)
+TOMBSTONE_RETENTION = timedelta(days=app.config['TOMBSTONE_RETENTION_DAYS'])
+STREAM_FORMATS = ('ndjson', 'stream')
+STREAM_BATCH_SIZE = 500
+
+def is_all_users(user_id):
+    return not user_id or user_id in ('0', 'all', 'NaN')
+
+def build_list_query(model, date_column, text_filters):
+    """Build the filtered, keyset-paginated query for a list endpoint.
+
+    Supported query parameters:
+      user_id, role          - owner filters
+      date_from, date_to     - inclusive range on ``date_column`` (YYYY-MM-DD)
+      sort                   - id, date or created_at, prefixed with '-' for descending
+      limit, after_id        - page size and keyset cursor (see ``make_cursor``)
+    plus the exact-match columns given in ``text_filters``.
+
+    The query selects the columns of ``LIST_SERIALIZERS[model]`` as tuples,
+    with the record id first. Returns ``(query, limit, cursor)``; ``limit``
+    is None when the caller asked for every row, and ``cursor(row)`` gives
+    the ``after_id`` that continues after ``row``. Raises ValueError for
+    malformed parameters.
+    """
+    args = request.args
+    query = db.session.query(*LIST_SERIALIZERS[model].columns).select_from(model).join(model.user)
+
+    user_id = args.get('user_id')
+    if not is_all_users(user_id):
         try:
-            db.session.commit()
-            logger.info("Default users created successfully")
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error initializing database: {str(e)}")
-            raise
+            query = query.filter(model.user_id == int(user_id))
+        except ValueError:
+            raise ValueError("user_id must be an integer")
+
+    role = args.get('role')
+    if role:
+        query = query.filter(User.role == role)
+
+    for param, column in text_filters.items():
+        value = args.get(param)
+        if value:
+            query = query.filter(column == value)
+
+    if args.get('date_from'):
+        query = query.filter(date_column >= args['date_from'])
+    if args.get('date_to'):
+        query = query.filter(date_column <= args['date_to'])
+
+    sort = args.get('sort', DEFAULT_SORT)
+    descending = sort.startswith('-')
+    sort_columns = {'id': model.id, 'date': date_column, 'created_at': model.created_at}
+    sort_column = sort_columns.get(sort.lstrip('-'))
+    if sort_column is None:
+        raise ValueError(f"sort must be one of: {', '.join(sort_columns)}")
+
+    after_id = args.get('after_id')
+    if after_id:
+        anchor, _, after_id = after_id.rpartition(',')
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            raise ValueError("after_id must be an integer or a cursor from X-Next-After-Id")
+        if sort_column is model.id:
+            query = query.filter(model.id < after_id if descending else model.id > after_id)
+        else:
+            if anchor:
+                anchor = parse_timestamp(anchor, 'after_id') if sort_column is model.created_at else anchor
+            else:
+                # A bare id, as sent by older clients: look its sort value up
+                row = db.session.query(sort_column).filter(model.id == after_id).first()
+                if row is None:
+                    raise ValueError("after_id does not refer to an existing record")
+                anchor = row[0]
+            if descending:
+                query = query.filter(or_(sort_column < anchor,
+                                         and_(sort_column == anchor, model.id < after_id)))
+            else:
+                query = query.filter(or_(sort_column > anchor,
+                                         and_(sort_column == anchor, model.id > after_id)))
+
+    if sort_column is model.id:
+        order = [model.id.desc() if descending else model.id.asc()]
+    elif descending:
+        order = [sort_column.desc(), model.id.desc()]
+    else:
+        order = [sort_column.asc(), model.id.asc()]
+    query = query.order_by(*order)
+
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        limit = min(limit, MAX_PAGE_SIZE)
+    return query, limit, make_cursor(model, sort_column)
+
+def make_cursor(model, sort_column):
+    """Return ``cursor(row)``, the ``after_id`` to continue after a result row.
+
+    Sorted by id the cursor is the row's id. Otherwise it is
+    ``<sort value>,<id>``, so the next page does not depend on that row
+    still existing.
+    """
+    if sort_column is model.id:
+        return lambda row: str(row[0])
+    position = LIST_SERIALIZERS[model].fields.index(sort_column.key)
+
+    def cursor(row):
+        value = row[position]
+        if value is None:
+            return str(row[0])
+        return f"{value.isoformat() if isinstance(value, datetime) else value},{row[0]}"
+    return cursor
+
+def parse_timestamp(value, name):
+    """Parse an ISO 8601 timestamp into the naive UTC datetimes the models store."""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def list_validators(model, user_id):
+    """Return the ETag and Last-Modified time for a list request.
+
+    As with ``portfolio_etag``, a single aggregate query is enough: the
+    newest id and updated_at catch additions and edits, the newest
+    tombstone catches deletions and the owners' updated_at catches changes
+    to the embedded user objects. The query string is part of the ETag,
+    so each filter, sort and page has its own.
+    """
+    owned = [] if user_id is None else [model.user_id == user_id]
+    owners = [] if user_id is None else [User.id == user_id]
+    row = db.session.execute(db.select(
+        db.select(db.func.max(model.id)).where(*owned).scalar_subquery(),
+        db.select(db.func.max(model.updated_at)).where(*owned).scalar_subquery(),
+        db.select(db.func.max(User.updated_at)).where(*owners).scalar_subquery(),
+        *tombstones.latest(model.__tablename__, user_id),
+    )).first()
+    fingerprint = (model.__tablename__, sorted(request.args.items(multi=True))) + tuple(row)
+    etag = hashlib.sha1(repr(fingerprint).encode()).hexdigest()
+    last_modified = max((t for t in (row[1], row[2], row[4]) if t is not None), default=None)
+    if last_modified is not None and last_modified >= datetime.utcnow().replace(microsecond=0):
+        # Last-Modified has whole seconds; a later write in this same second
+        # would look unmodified to If-Modified-Since, so leave it to the ETag
+        last_modified = None
+    return etag, last_modified
+
+def set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        # Assigning None would stamp the current time
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def list_records(model, date_column, text_filters=None):
+    """Run a list query and return the JSON response.
 
-# Initialize the database
-init_db()
+    When a ``limit`` is given and more rows remain, a cursor for the last
+    row returned is sent in the X-Next-After-Id header so the client can
+    pass it back as ``after_id``. ``format=ndjson`` or ``format=stream`` switch to a
+    streamed response (see ``stream_records``).
+
+    Responses carry an ETag, and a Last-Modified once the newest change
+    is more than a second old; a client revalidating an unchanged list
+    gets a 304 before any rows are read. With
+    ``updated_since`` the response is an object holding the rows changed
+    after that time (``items``), tombstones for the rows deleted since
+    (``deleted``) and the ``server_time`` to pass as ``updated_since`` on
+    the next poll.
+    """
+    query, limit, cursor = build_list_query(model, date_column, text_filters or {})
+    serializer = LIST_SERIALIZERS[model]
+    output_format = request.args.get('format', 'json')
+    if output_format not in ('json',) + STREAM_FORMATS:
+        raise ValueError(f"format must be one of: json, {', '.join(STREAM_FORMATS)}")
+
+    since = request.args.get('updated_since')
+    if since:
+        if output_format != 'json':
+            raise ValueError("updated_since is only supported with format=json")
+        since = parse_timestamp(since, 'updated_since')
+        if since < datetime.utcnow() - TOMBSTONE_RETENTION:
+            return jsonify({'success': False,
+                            'message': 'updated_since is older than the deletion history; refetch the full list'}), 410
+        query = query.filter(model.updated_at > since)
+
+    user_id = request.args.get('user_id')
+    owner = None if is_all_users(user_id) else int(user_id)
+    etag, last_modified = list_validators(model, owner)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return set_validators(Response(status=304), etag, last_modified)
+    server_time = datetime.utcnow() - SYNC_OVERLAP
+
+    if output_format in STREAM_FORMATS:
+        if limit is not None:
+            query = query.limit(limit)
+        logger.info("Streaming %s as %s", model.__tablename__, output_format, extra=SAMPLED)
+        return set_validators(stream_records(query, serializer, output_format), etag, last_modified)
+
+    if limit is None:
+        rows = query.all()
+        next_after_id = None
+    else:
+        rows = query.limit(limit + 1).all()
+        next_after_id = cursor(rows[limit - 1]) if len(rows) > limit else None
+        rows = rows[:limit]
+
+    items = serializer.serialize(rows)
+    if since:
+        response = json_response({
+            'items': items,
+            'deleted': tombstones.deleted_since(db.session.connection(), model.__tablename__, since, owner),
+            'server_time': server_time.isoformat()
+        })
+    else:
+        response = json_response(items)
+    set_validators(response, etag, last_modified)
+    if next_after_id is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_after_id
+    logger.info("Successfully fetched %s %s", len(rows), model.__tablename__, extra=SAMPLED)
+    return response
+
+def stream_records(query, serializer, output_format):
+    """Stream query results without materializing them.
+
+    Rows are fetched from the database in batches of STREAM_BATCH_SIZE and
+    written out as they arrive, so memory use does not grow with the number
+    of rows. ``ndjson`` emits one JSON object per line; ``stream`` emits a
+    regular JSON array in chunks.
+    """
+    def generate_ndjson():
+        for record in serializer.iter_serialize(query.yield_per(STREAM_BATCH_SIZE)):
+            yield serializers.dumps(record) + b'\n'
+
+    def generate_array():
+        yield b'['
+        separator = b''
+        for record in serializer.iter_serialize(query.yield_per(STREAM_BATCH_SIZE)):
+            yield separator + serializers.dumps(record)
+            separator = b','
+        yield b']'
+
+    if output_format == 'ndjson':
+        return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+    return Response(stream_with_context(generate_array()), mimetype='application/json')
+
+# Response caching for the list endpoints (see cache.py)
+CACHED_HEADERS = ('Content-Type', NEXT_CURSOR_HEADER, 'ETag', 'Last-Modified', 'Cache-Control')
+
+def cached_list(collection):
+    """Serve repeated GETs of a list endpoint from the response cache.
+
+    Streamed responses, delta syncs and errors are never cached. Writes
+    must call ``invalidate_cached`` for the users whose records they
+    touched. A hit whose ETag the client already has becomes a 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if (response_cache is None or request.method != 'GET'
+                    or request.args.get('format') in STREAM_FORMATS
+                    or request.args.get('updated_since')):
+                return view(*args, **kwargs)
+
+            user_id = request.args.get('user_id')
+            if is_all_users(user_id):
+                owner = ALL_USERS
+            elif user_id.isdigit():
+                owner = str(int(user_id))
+            else:
+                return view(*args, **kwargs)
+
+            key = response_cache.key(request.path, collection, owner, request.args)
+            cached = response_cache.get(key)
+            if cached is not None:
+                body, status, headers = cached
+                response = Response(body, status=status, headers=headers)
+                response.make_conditional(request)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                headers = {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers}
+                response_cache.set(key, (response.get_data(), response.status_code, headers))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+def invalidate_cached(collection, user_ids):
+    if response_cache is not None:
+        response_cache.invalidate(collection, [str(user_id) for user_id in user_ids])
+
+# Full-text search
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+# Bulk creation for the certificate, project and internship endpoints
+BULK_MAX_ROWS = 10000
+ID_LOOKUP_CHUNK = 500
+
+def read_bulk_rows():
+    """Return the submitted records as a list of dicts.
+
+    Accepts a JSON array (or an object with a ``records`` array), a CSV
+    file uploaded as the ``file`` form field, or a ``text/csv`` body. CSV
+    input must start with a header row naming the fields.
+    """
+    if 'file' in request.files:
+        text = request.files['file'].read().decode('utf-8-sig')
+        return list(csv.DictReader(io.StringIO(text)))
+    if request.mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('records')
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of records or a CSV upload")
+    return data
+
+def record_values(record):
+    return {field: getattr(record, field) for field in record.FIELDS}
+
+def record_deleted(collection, records):
+    """Uncount deleted records and leave tombstones for them, in the current transaction.
+
+    ``records`` are dicts of the records' column values including 'id'.
+    """
+    connection = db.session.connection()
+    analytics.record_deleted(connection, collection, records)
+    tombstones.record_deleted(connection, collection, records)
+    tombstones.prune(connection, datetime.utcnow() - TOMBSTONE_RETENTION)
+
+def delete_records(model, condition):
+    """Delete the ``model`` rows matching ``condition`` in one statement, in the current transaction.
+
+    DELETE ... RETURNING hands back the deleted rows' values without
+    loading them as objects. They are uncounted and tombstoned in
+    grouped statements, and the search triggers fire as usual. Returns
+    the deleted records as dicts.
+    """
+    columns = [model.id] + [getattr(model, field) for field in model.FIELDS]
+    statement = db.delete(model).where(condition).returning(*columns)
+    deleted = [dict(row._mapping) for row in db.session.execute(
+        statement, execution_options={'synchronize_session': False})]
+    if deleted:
+        record_deleted(model.__tablename__, deleted)
+    return deleted
+
+def delete_users(user_ids):
+    """Delete users and everything they own, in the current transaction.
+
+    Each record table is cleared with one set-based DELETE rather than
+    the ORM cascade, which loads every record and deletes them one by
+    one. Returns ``(deleted user ids, records deleted per collection)``.
+    """
+    counts = {}
+    for name, model in COLLECTIONS.items():
+        counts[name] = len(delete_records(model, model.user_id.in_(user_ids)))
+    statement = db.delete(User).where(User.id.in_(user_ids)).returning(User.id)
+    deleted = db.session.execute(statement, execution_options={'synchronize_session': False}).scalars().all()
+    return deleted, counts
+
+def id_list(data, key):
+    values = data[key]
+    if not isinstance(values, list) or not values or not all(type(v) is int for v in values):
+        raise ValueError(f"{key} must be a non-empty array of integers")
+    if len(values) > BULK_MAX_ROWS:
+        raise ValueError(f"At most {BULK_MAX_ROWS} {key} can be given at once")
+    return values
+
+def bulk_delete_condition(model, date_column, text_filters, data):
+    """Build the WHERE clause for a bulk delete from the request body.
+
+    Accepts ``ids``, ``user_ids``, ``role``, ``date_from``, ``date_to``
+    and the exact-match fields in ``text_filters``, combined with AND.
+    Raises ValueError for malformed input or when no filter is given, so
+    a bulk delete never empties a table by accident.
+    """
+    conditions = []
+    if 'ids' in data:
+        conditions.append(model.id.in_(id_list(data, 'ids')))
+    if 'user_ids' in data:
+        conditions.append(model.user_id.in_(id_list(data, 'user_ids')))
+    if data.get('role'):
+        conditions.append(model.user_id.in_(db.select(User.id).where(User.role == data['role'])))
+    for param, column in text_filters.items():
+        if data.get(param):
+            conditions.append(column == data[param])
+    if data.get('date_from'):
+        conditions.append(date_column >= data['date_from'])
+    if data.get('date_to'):
+        conditions.append(date_column <= data['date_to'])
+    if not conditions:
+        raise ValueError("Give ids, user_ids or at least one filter")
+    return and_(*conditions)
+
+def handle_bulk_delete(model, date_column, text_filters=None):
+    name = model.__tablename__
+    if not is_admin():
+        return jsonify({'success': False, 'message': 'Only administrators can bulk delete records'}), 403
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'message': 'No data provided'}), 400
+        condition = bulk_delete_condition(model, date_column, text_filters or {}, data)
+
+        deleted = delete_records(model, condition)
+        db.session.commit()
+        invalidate_cached(name, {record['user_id'] for record in deleted})
+        logger.info("Bulk deleted %s %s", len(deleted), name)
+        result = {'success': True, 'deleted': len(deleted)}
+        if 'ids' in data:
+            found = {record['id'] for record in deleted}
+            result['not_found'] = [record_id for record_id in data['ids'] if record_id not in found]
+        return jsonify(result)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error bulk deleting %s: %s", name, e)
+        return jsonify({'success': False, 'message': 'An error occurred'}), 500
+
+def existing_user_ids(user_ids):
+    found = set()
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), ID_LOOKUP_CHUNK):
+        chunk = user_ids[start:start + ID_LOOKUP_CHUNK]
+        found.update(db.session.execute(db.select(User.id).where(User.id.in_(chunk))).scalars())
+    return found
+
+def bulk_create(model, rows, owner=None):
+    """Validate ``rows`` and insert the valid ones in a single transaction.
+
+    Each row's fields must be text (``user_id`` an integer) and pass the
+    model's ``validate()``. Rows that fail, that reference a user that
+    does not exist, or that belong to someone other than ``owner`` when it
+    is given, are reported by their 1-based position instead of aborting
+    the whole batch. Returns
+    ``(created_rows, errors)``.
+    """
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'message': 'Record must be an object'})
+            continue
+        values = {field: row.get(field) for field in model.FIELDS}
+        not_strings = [field for field in model.FIELDS
+                       if field != 'user_id' and values[field] is not None and not isinstance(values[field], str)]
+        if not_strings:
+            errors.append({'row': number, 'message': f"{', '.join(not_strings)} must be text"})
+            continue
+        user_id = values['user_id']
+        try:
+            if isinstance(user_id, bool) or not isinstance(user_id, (int, str, type(None))):
+                raise TypeError
+            values['user_id'] = int(user_id) if user_id not in (None, '') else None
+        except (TypeError, ValueError):
+            errors.append({'row': number, 'message': 'User ID must be an integer'})
+            continue
+        try:
+            model(**values).validate()
+        except ValueError as e:
+            errors.append({'row': number, 'message': str(e)})
+            continue
+        if owner is not None and values['user_id'] != owner:
+            errors.append({'row': number, 'message': 'You can only import your own records'})
+            continue
+        valid.append((number, values))
+
+    known_users = existing_user_ids({values['user_id'] for _, values in valid})
+    created = []
+    for number, values in valid:
+        if values['user_id'] in known_users:
+            created.append(values)
+        else:
+            errors.append({'row': number, 'message': f"User {values['user_id']} does not exist"})
+
+    if created:
+        db.session.execute(db.insert(model), created)
+        analytics.record_created(db.session.connection(), model.__tablename__, created)
+        db.session.commit()
+    errors.sort(key=lambda e: e['row'])
+    return created, errors
+
+def handle_bulk_create(model):
+    name = model.__tablename__
+    try:
+        rows = read_bulk_rows()
+        if not rows:
+            return jsonify({'success': False, 'message': 'No data provided'}), 400
+        if request.args.get('async') == '1':
+            # Imports of any size, run by a background worker
+            if not is_admin():
+                return jsonify({'success': False, 'message': 'Only administrators can queue jobs'}), 403
+            job = job_queue.submit('import', {'collection': name, 'records': rows}, current_user_id())
+            logger.info("Queued job %s to import %s %s", job['id'], len(rows), name)
+            return job_accepted(job)
+        if len(rows) > BULK_MAX_ROWS:
+            return jsonify({'success': False, 'message': f'At most {BULK_MAX_ROWS} records can be imported at once'}), 413
+
+        logger.info("Bulk importing %s %s", len(rows), name)
+        created, errors = bulk_create(model, rows, restricted_user_id())
+        invalidate_cached(name, {values['user_id'] for values in created})
+        logger.info("Bulk imported %s %s, %s rejected", len(created), name, len(errors))
+        return jsonify({
+            'success': not errors,
+            'created': len(created),
+            'failed': len(errors),
+            'errors': errors
+        }), 200 if created or not errors else 400
+    except (ValueError, csv.Error, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error bulk importing %s: %s", name, e)
+        return jsonify({'success': False, 'message': 'An error occurred'}), 500
+
+# Background jobs for imports, exports and seeding (see jobs.py)
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_DIR = app.config['EXPORT_DIR'] or os.path.join(app.instance_path, 'exports')
+JOB_MAX_ERRORS = 100
+JOB_LIST_MAX = 100
+SEED_MAX_COPIES = 100
+
+job_queue = jobs.JobQueue(
+    app, db,
+    workers=app.config['JOBS_WORKERS'],
+    poll_interval=app.config['JOBS_POLL_INTERVAL'],
+    timeout=app.config['JOBS_TIMEOUT'],
+    max_attempts=app.config['JOBS_MAX_ATTEMPTS']
+)
+
+def check_collection(params):
+    if params.get('collection') not in COLLECTIONS:
+        raise ValueError(f"collection must be one of: {', '.join(COLLECTIONS)}")
+
+def check_import(params):
+    check_collection(params)
+    if not isinstance(params.get('records'), list) or not params['records']:
+        raise ValueError("records must be a non-empty array")
+
+def check_export(params):
+    check_collection(params)
+    if params.get('format', 'csv') not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if params.get('user_id') is not None and not isinstance(params['user_id'], int):
+        raise ValueError("user_id must be an integer")
+
+def check_seed(params):
+    user_ids = params.get('user_ids')
+    if user_ids is not None and not (isinstance(user_ids, list) and all(isinstance(i, int) for i in user_ids)):
+        raise ValueError("user_ids must be an array of integers")
+    copies = params.get('copies', 1)
+    if not isinstance(copies, int) or not 1 <= copies <= SEED_MAX_COPIES:
+        raise ValueError(f"copies must be between 1 and {SEED_MAX_COPIES}")
+
+def import_in_batches(model, rows):
+    """``bulk_create`` rows BULK_MAX_ROWS at a time; return (created count, errors)."""
+    created, errors = 0, []
+    for start in range(0, len(rows), BULK_MAX_ROWS):
+        batch, batch_errors = bulk_create(model, rows[start:start + BULK_MAX_ROWS])
+        invalidate_cached(model.__tablename__, {values['user_id'] for values in batch})
+        created += len(batch)
+        errors += [dict(error, row=error['row'] + start) for error in batch_errors]
+    return created, errors
+
+@jobs.handler('import', check=check_import)
+def import_job(job_id, params):
+    """Import ``records`` into ``collection`` like the /bulk endpoints, without the row cap."""
+    created, errors = import_in_batches(COLLECTIONS[params['collection']], params['records'])
+    return {'created': created, 'failed': len(errors), 'errors': errors[:JOB_MAX_ERRORS]}
+
+@jobs.handler('seed', check=check_seed)
+def seed_job(job_id, params):
+    """Give each of ``user_ids`` (default: every student) ``copies`` of the init_db.py sample records.
+
+    Unlike ``flask init-db --sample-data`` this adds to the existing data
+    instead of resetting the database.
+    """
+    import init_db as sample
+    user_ids = params.get('user_ids')
+    if user_ids is None:
+        user_ids = db.session.execute(db.select(User.id).where(User.role == 'student')).scalars().all()
+    copies = params.get('copies', 1)
+    created = {}
+    for model, records in ((Certificate, sample.SAMPLE_CERTIFICATES),
+                           (Project, sample.SAMPLE_PROJECTS),
+                           (Internship, sample.SAMPLE_INTERNSHIPS)):
+        rows = [dict(record, user_id=user_id) for user_id in user_ids for _ in range(copies) for record in records]
+        created[model.__tablename__] = import_in_batches(model, rows)[0]
+    return {'users': len(user_ids), 'created': created}
+
+@jobs.handler('export', check=check_export, retry=True)
+def export_job(job_id, params):
+    """Write ``collection``, or one user's part of it, to a file in EXPORT_DIR.
+
+    CSV files have the record columns and can be imported again; NDJSON
+    lines match the list endpoint's records, including the user.
+    """
+    model = COLLECTIONS[params['collection']]
+    output_format = params.get('format', 'csv')
+    if output_format == 'csv':
+        serializer = PORTFOLIO_SERIALIZERS[model]
+        query = db.session.query(*serializer.columns).select_from(model)
+    else:
+        serializer = LIST_SERIALIZERS[model]
+        query = db.session.query(*serializer.columns).select_from(model).join(model.user)
+    if params.get('user_id') is not None:
+        query = query.filter(model.user_id == params['user_id'])
+    records = serializer.iter_serialize(query.order_by(model.id).yield_per(STREAM_BATCH_SIZE))
+
+    filename = f"job-{job_id}-{model.__tablename__}.{output_format}"
+    path = os.path.join(EXPORT_DIR, filename)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    count = 0
+    # Write under a temporary name so a download never sees a partial file
+    if output_format == 'csv':
+        with open(path + '.tmp', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=serializer.fields)
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+                count += 1
+    else:
+        with open(path + '.tmp', 'wb') as f:
+            for record in records:
+                f.write(serializers.dumps(record) + b'\n')
+                count += 1
+    os.replace(path + '.tmp', path)
+    return {'rows': count, 'file': filename, 'format': output_format}
+
+def current_user_id():
+    return g.current_user['id'] if g.current_user is not None else None
+
+def is_admin():
+    return g.current_user is not None and g.current_user.get('role') == 'admin'
+
+def restricted_user_id():
+    """The one user a student's token may write records for; None for admins and anonymous callers."""
+    if g.current_user is None or is_admin():
+        return None
+    return g.current_user['id']
+
+def owns(user_id):
+    """Whether the caller may write records for ``user_id``."""
+    owner = restricted_user_id()
+    if owner is None:
+        return True
+    try:
+        return int(user_id) == owner
+    except (TypeError, ValueError):
+        return False
+
+def not_owner():
+    return jsonify({'success': False, 'message': 'You can only change your own records'}), 403
+
+def can_see_job(job):
+    """Admins see every job; other callers only the jobs they submitted."""
+    return is_admin() or (job['created_by'] is not None and job['created_by'] == current_user_id())
+
+def job_accepted(job):
+    response = jsonify({'success': True, 'job': job})
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response, 202
+
+@app.before_request
+def start_job_workers():
+    # Threads do not survive a fork, so each server process starts its own workers
+    job_queue.ensure_started()
+
+# Authentication
+PUBLIC_ENDPOINTS = {'index', 'login', 'prometheus_metrics'}
+
+@app.before_request
+def authenticate():
+    """Attach the caller from the Bearer token, if any, to ``g.current_user``.
+
+    A token that is present but invalid is rejected, except on the public
+    endpoints, so a client holding an expired token can still log in.
+    Requests without a token are only rejected when AUTH_REQUIRED is set.
+    """
+    g.current_user = None
+    if request.method == 'OPTIONS' or request.endpoint in PUBLIC_ENDPOINTS:
+        return None
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        g.current_user = token_manager.verify(header[7:])
+        if g.current_user is None:
+            return jsonify({'success': False, 'message': 'Invalid or expired token'}), 401
+    elif app.config['AUTH_REQUIRED'] and request.endpoint not in PUBLIC_ENDPOINTS:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    return None
+
+# Rate limits and request body limits for the login and write endpoints
+RATE_LIMITS = {
+    'login': ratelimit.Limit.parse(app.config['RATELIMIT_LOGIN']),
+    'write': ratelimit.Limit.parse(app.config['RATELIMIT_WRITE']),
+    'bulk': ratelimit.Limit.parse(app.config['RATELIMIT_BULK']),
+}
+BULK_ENDPOINTS = {
+    'bulk_create_certificates', 'bulk_create_projects', 'bulk_create_internships',
+    'bulk_delete_certificates', 'bulk_delete_projects', 'bulk_delete_internships',
+    'bulk_delete_users', 'handle_jobs',
+}
+LOGIN_MAX_BODY = 4 * 1024
+
+def request_rule():
+    """Return the rate limit rule and body size limit for this request."""
+    if request.endpoint == 'login':
+        return 'login', LOGIN_MAX_BODY
+    if request.endpoint in BULK_ENDPOINTS:
+        return 'bulk', app.config['MAX_CONTENT_LENGTH']
+    return 'write', app.config['MAX_JSON_BODY']
+
+@app.before_request
+def guard_writes():
+    """Refuse oversized bodies and clients over their rate limit before the view runs.
+
+    Runs after ``authenticate``: signed-in clients are limited per user,
+    anonymous ones per address. The body size is checked from
+    Content-Length before anything is read or parsed. Bodies sent without
+    a length are read up to MAX_CONTENT_LENGTH and then checked.
+    """
+    if request.method in ('GET', 'HEAD', 'OPTIONS') or request.endpoint is None:
+        return None
+    rule, max_body = request_rule()
+    length = request.content_length
+    if length is None and request.headers.get('Transfer-Encoding'):
+        length = len(request.get_data())
+    if max_body and length and length > max_body:
+        return jsonify({'success': False, 'message': f'Request body exceeds {max_body} bytes'}), 413
+
+    limit = RATE_LIMITS[rule]
+    if rate_limiter is None or limit is None:
+        return None
+    if g.current_user is not None and rule != 'login':
+        client = f"user:{g.current_user['id']}"
+    else:
+        client = f"ip:{request.remote_addr}"
+    allowed, retry_after = rate_limiter.hit(rule, limit, client)
+    if not allowed:
+        response = jsonify({'success': False, 'message': 'Too many requests, please slow down'})
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response, 429
+    return None
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'success': False, 'message': 'Request body too large'}), 413
 
 @app.route('/')
 def index():
@@ -155,6 +1132,10 @@ def login():
             
         user = User.query.filter_by(username=data['username']).first()
         if user and user.check_password(data['password']):
+            if passwords.needs_rehash(user.password_hash):
+                # Upgrade hashes made with an older work factor while we have the password
+                user.set_password(data['password'])
+                db.session.commit()
             return jsonify({
                 'success': True,
                 'user': {
@@ -162,53 +1143,257 @@ def login():
                     'username': user.username,
                     'role': user.role,
                     'name': user.name
-                }
+                },
+                'token': token_manager.issue(user),
+                'expires_in': app.config['TOKEN_MAX_AGE']
             })
         return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
+    except passwords.HashingBusy:
+        logger.warning("Login rejected: password hashing pool is saturated")
+        response = jsonify({'success': False, 'message': 'Server busy, please try again'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         return jsonify({'success': False, 'message': 'An error occurred during login'}), 500
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({'success': False, 'message': 'Metrics are disabled'}), 404
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def cache_metrics():
+    if response_cache is None:
+        return []
+    stats = response_cache.stats()
+    return [
+        ('svu_response_cache_hits_total', 'counter', 'List responses served from the cache.', stats['hits']),
+        ('svu_response_cache_misses_total', 'counter', 'List responses built because the cache had no entry.', stats['misses']),
+        ('svu_response_cache_invalidations_total', 'counter', 'Writes that invalidated cached responses.', stats['invalidations']),
+    ]
+
+request_metrics.add_collector(cache_metrics)
+
+def rate_limit_metrics():
+    if rate_limiter is None:
+        return []
+    stats = rate_limiter.stats()
+    return [
+        ('svu_rate_limit_allowed_total', 'counter', 'Requests checked against a rate limit and let through.', stats['allowed']),
+        ('svu_rate_limit_rejected_total', 'counter', 'Requests refused with 429.', stats['limited']),
+        ('svu_rate_limit_errors_total', 'counter', 'Rate limit checks skipped because the backend failed.', stats['errors']),
+    ]
+
+request_metrics.add_collector(rate_limit_metrics)
+
+def job_metrics():
+    counts = job_queue.counts()
+    return [
+        ('svu_jobs_queued', 'gauge', 'Background jobs waiting for a worker.', counts['queued']),
+        ('svu_jobs_running', 'gauge', 'Background jobs being run.', counts['running']),
+        ('svu_jobs_succeeded_total', 'counter', 'Background jobs this process completed.', job_queue.succeeded),
+        ('svu_jobs_failed_total', 'counter', 'Background jobs this process ran that failed.', job_queue.failed),
+    ]
+
+request_metrics.add_collector(job_metrics)
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    if response_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **response_cache.stats()})
+
+def remove_users(user_ids):
+    """Delete users with their records and answer with what was removed."""
+    deleted, counts = delete_users(user_ids)
+    db.session.commit()
+    for name in COLLECTIONS:
+        invalidate_cached(name, deleted)
+    logger.info("Deleted %s users with %s", len(deleted), counts)
+    found = set(deleted)
+    return {'success': True, 'deleted': len(deleted), 'records_deleted': counts,
+            'not_found': [user_id for user_id in user_ids if user_id not in found]}
+
+@app.route('/api/users/<int:id>', methods=['DELETE'])
+def delete_user(id):
+    if not is_admin():
+        return jsonify({'success': False, 'message': 'Only administrators can delete users'}), 403
+    try:
+        result = remove_users([id])
+        if not result['deleted']:
+            return jsonify({'success': False, 'message': 'User not found'}), 404
+        return jsonify(result)
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error deleting user: %s", e)
+        return jsonify({'success': False, 'message': 'An error occurred'}), 500
+
+@app.route('/api/users/bulk-delete', methods=['POST'])
+def bulk_delete_users():
+    if not is_admin():
+        return jsonify({'success': False, 'message': 'Only administrators can delete users'}), 403
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or 'ids' not in data:
+            return jsonify({'success': False, 'message': 'Missing ids'}), 400
+        return jsonify(remove_users(id_list(data, 'ids')))
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error bulk deleting users: %s", e)
+        return jsonify({'success': False, 'message': 'An error occurred'}), 500
+
+@app.route('/api/users/<int:id>/portfolio', methods=['GET'])
+def get_portfolio(id):
+    """Return a user together with all their certificates, projects and internships.
+
+    The ETag is derived from a single aggregate query over the user's rows,
+    so a client revalidating an unchanged portfolio gets a 304 without any
+    records being loaded or serialized.
+    """
+    try:
+        etag = portfolio_etag(id)
+        if etag is None:
+            return jsonify({'success': False, 'message': 'User not found'}), 404
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        def records(model):
+            serializer = PORTFOLIO_SERIALIZERS[model]
+            rows = db.session.execute(
+                db.select(*serializer.columns).where(model.user_id == id).order_by(model.id))
+            return serializer.serialize(rows)
+
+        user = db.session.get(User, id)
+        response = json_response({
+            'user': user.to_summary(),
+            'certificates': records(Certificate),
+            'projects': records(Project),
+            'internships': records(Internship)
+        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        logger.error("Error fetching portfolio: %s", e)
+        return jsonify({'success': False, 'message': 'An error occurred'}), 500
+
+def portfolio_etag(user_id):
+    """Fingerprint a user's portfolio, or return None if the user does not exist.
+
+    Row counts catch deletions, max ids catch additions and max updated_at
+    catches edits, which is enough to tell whether anything changed.
+    """
+    def summary(model):
+        where = model.user_id == user_id
+        return [
+            db.select(db.func.count()).where(where).scalar_subquery(),
+            db.select(db.func.max(model.id)).where(where).scalar_subquery(),
+            db.select(db.func.max(model.updated_at)).where(where).scalar_subquery(),
+        ]
+
+    row = db.session.execute(
+        db.select(User.updated_at, *summary(Certificate), *summary(Project), *summary(Internship))
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    return hashlib.sha1(repr((user_id,) + tuple(row)).encode()).hexdigest()
+
+@app.route('/api/search', methods=['GET'])
+def search_records():
+    """Ranked full-text search over certificates, projects and internships.
+
+    Query parameters: q (required), kind (certificate, project or
+    internship), user_id, limit (default 20, at most 100) and offset.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'success': False, 'message': 'Missing search query'}), 400
+        kind = request.args.get('kind')
+        if kind and kind not in search.SOURCES:
+            return jsonify({'success': False, 'message': f"kind must be one of: {', '.join(search.SOURCES)}"}), 400
+        try:
+            user_id = int(request.args['user_id']) if request.args.get('user_id') else None
+            limit = min(max(int(request.args.get('limit', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+            offset = max(int(request.args.get('offset', 0)), 0)
+        except ValueError:
+            return jsonify({'success': False, 'message': 'user_id, limit and offset must be integers'}), 400
+
+        connection = db.session.connection()
+        if not search.is_available(connection):
+            return jsonify({'success': False, 'message': 'Search is only available with SQLite'}), 501
+
+        logger.info("Searching for %r", query, extra=SAMPLED)
+        results = search.search(connection, query, kind=kind, user_id=user_id, limit=limit + 1, offset=offset)
+        has_more = len(results) > limit
+        results = results[:limit]
+
+        user_ids = {r['user_id'] for r in results}
+        users = {u.id: u.to_summary() for u in User.query.filter(User.id.in_(user_ids))} if user_ids else {}
+        for result in results:
+            result['id'] = result.pop('record_id')
+            result['user'] = users.get(result['user_id'])
+
+        return jsonify({
+            'results': results,
+            'next_offset': offset + limit if has_more else None
+        })
+    except OperationalError as e:
+        db.session.rollback()
+        logger.error("Search query failed: %s", e)
+        return jsonify({'success': False, 'message': 'Invalid search query'}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error searching: %s", e)
+        return jsonify({'success': False, 'message': 'An error occurred'}), 500
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Dashboard counts served from the analytics rollups.
+
+    Optional query parameters: user_id to limit the per-month project
+    counts to one student, and limit to cap each list.
+    """
+    try:
+        try:
+            user_id = int(request.args['user_id']) if request.args.get('user_id') else None
+            limit = int(request.args['limit']) if request.args.get('limit') else None
+        except ValueError:
+            return jsonify({'success': False, 'message': 'user_id and limit must be integers'}), 400
+        return jsonify(analytics.get_stats(db.session.connection(), user_id=user_id, limit=limit))
+    except Exception as e:
+        logger.error("Error fetching stats: %s", e)
+        return jsonify({'success': False, 'message': 'An error occurred'}), 500
+
 @app.route('/api/certificates', methods=['GET', 'POST'])
+@cached_list('certificates')
 def handle_certificates():
     try:
         if request.method == 'GET':
             user_id = request.args.get('user_id')
-            logger.info(f"Fetching certificates for user_id: {user_id}")
+            logger.info("Fetching certificates for user_id: %s", user_id, extra=SAMPLED)
             
             try:
-                if not user_id or user_id == '0' or user_id == 'all' or user_id == 'NaN':
-                    certificates = Certificate.query.all()
-                else:
-                    certificates = Certificate.query.filter_by(user_id=int(user_id)).all()
-                
-                result = [{
-                    'id': c.id,
-                    'title': c.title,
-                    'issuer': c.issuer,
-                    'date_issued': c.date_issued,
-                    'user_id': c.user_id,
-                    'created_at': c.created_at.isoformat() if c.created_at else None,
-                    'updated_at': c.updated_at.isoformat() if c.updated_at else None,
-                    'user': {
-                        'id': c.user.id,
-                        'username': c.user.username,
-                        'role': c.user.role,
-                        'name': c.user.name
-                    } if c.user else None
-                } for c in certificates]
-                
-                logger.info(f"Successfully fetched {len(result)} certificates")
-                return jsonify(result)
+                return list_records(Certificate, Certificate.date_issued, {'issuer': Certificate.issuer})
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
             except Exception as e:
-                logger.error(f"Error fetching certificates: {str(e)}")
-                return jsonify([])
+                # Never a 200: an empty list here would be cached as if it were real
+                logger.error("Error fetching certificates: %s", e)
+                return jsonify({'success': False, 'message': 'An error occurred'}), 500
                 
         elif request.method == 'POST':
             data = request.get_json()
             if not data:
                 return jsonify({'success': False, 'message': 'No data provided'}), 400
                 
-            logger.info(f"Creating new certificate: {data}")
+            logger.info("Creating new certificate: %s", data)
             certificate = Certificate(
                 title=data.get('title'),
                 issuer=data.get('issuer'),
@@ -217,9 +1402,13 @@ def handle_certificates():
             )
             
             certificate.validate()
+            if not owns(certificate.user_id):
+                return not_owner()
             db.session.add(certificate)
+            analytics.record_created(db.session.connection(), 'certificates', [record_values(certificate)])
             db.session.commit()
-            logger.info(f"Successfully created certificate with ID: {certificate.id}")
+            invalidate_cached('certificates', [certificate.user_id])
+            logger.info("Successfully created certificate with ID: %s", certificate.id)
             
             return jsonify({
                 'success': True,
@@ -229,66 +1418,57 @@ def handle_certificates():
             
     except ValueError as e:
         db.session.rollback()
-        logger.error(f"Validation error in certificates: {str(e)}")
+        logger.error("Validation error in certificates: %s", e)
         return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error in certificates: {str(e)}")
+        logger.error("Error in certificates: %s", e)
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
+@app.route('/api/certificates/bulk', methods=['POST'])
+def bulk_create_certificates():
+    return handle_bulk_create(Certificate)
+
+@app.route('/api/certificates/bulk-delete', methods=['POST'])
+def bulk_delete_certificates():
+    return handle_bulk_delete(Certificate, Certificate.date_issued, {'issuer': Certificate.issuer})
+
 @app.route('/api/certificates/<int:id>', methods=['DELETE'])
 def delete_certificate(id):
     try:
-        certificate = db.session.get(Certificate, id)
-        if not certificate:
+        owner = db.session.execute(db.select(Certificate.user_id).where(Certificate.id == id)).scalar()
+        if owner is not None and not owns(owner):
+            return not_owner()
+        deleted = delete_records(Certificate, Certificate.id == id)
+        if not deleted:
             return jsonify({'success': False, 'message': 'Certificate not found'}), 404
-        
-        db.session.delete(certificate)
+
         db.session.commit()
+        invalidate_cached('certificates', [deleted[0]['user_id']])
         return jsonify({'success': True, 'message': 'Certificate deleted successfully'})
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error deleting certificate: {str(e)}")
+        logger.error("Error deleting certificate: %s", e)
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
 @app.route('/api/projects', methods=['GET', 'POST'])
+@cached_list('projects')
 def handle_projects():
     try:
         if request.method == 'GET':
             user_id = request.args.get('user_id')
-            logger.info(f"Fetching projects for user_id: {user_id}")
+            logger.info("Fetching projects for user_id: %s", user_id, extra=SAMPLED)
             
             try:
-                if not user_id or user_id == '0' or user_id == 'all' or user_id == 'NaN':
-                    if request.args.get('view') == 'all':
-                        projects = Project.query.all()
-                    else:
-                        return jsonify([])
-                else:
-                    projects = Project.query.filter_by(user_id=int(user_id)).all()
-                
-                result = [{
-                    'id': p.id,
-                    'title': p.title,
-                    'description': p.description,
-                    'start_date': p.start_date,
-                    'end_date': p.end_date,
-                    'user_id': p.user_id,
-                    'created_at': p.created_at.isoformat() if p.created_at else None,
-                    'updated_at': p.updated_at.isoformat() if p.updated_at else None,
-                    'user': {
-                        'id': p.user.id,
-                        'username': p.user.username,
-                        'role': p.user.role,
-                        'name': p.user.name
-                    } if p.user else None
-                } for p in projects]
-                
-                logger.info(f"Successfully fetched {len(result)} projects")
-                return jsonify(result)
+                if is_all_users(user_id) and request.args.get('view') != 'all':
+                    return jsonify([])
+                return list_records(Project, Project.start_date, {})
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
             except Exception as e:
-                logger.error(f"Error fetching projects: {str(e)}")
-                return jsonify([])
+                # Never a 200: an empty list here would be cached as if it were real
+                logger.error("Error fetching projects: %s", e)
+                return jsonify({'success': False, 'message': 'An error occurred'}), 500
                 
         elif request.method == 'POST':
             data = request.get_json()
@@ -303,8 +1483,12 @@ def handle_projects():
                 user_id=data.get('user_id')
             )
             
+            if not owns(project.user_id):
+                return not_owner()
             db.session.add(project)
+            analytics.record_created(db.session.connection(), 'projects', [record_values(project)])
             db.session.commit()
+            invalidate_cached('projects', [project.user_id])
             
             return jsonify({
                 'success': True,
@@ -314,63 +1498,53 @@ def handle_projects():
             
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error in projects: {str(e)}")
+        logger.error("Error in projects: %s", e)
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
+@app.route('/api/projects/bulk', methods=['POST'])
+def bulk_create_projects():
+    return handle_bulk_create(Project)
+
+@app.route('/api/projects/bulk-delete', methods=['POST'])
+def bulk_delete_projects():
+    return handle_bulk_delete(Project, Project.start_date, {})
+
 @app.route('/api/projects/<int:id>', methods=['DELETE'])
 def delete_project(id):
     try:
-        project = db.session.get(Project, id)
-        if not project:
+        owner = db.session.execute(db.select(Project.user_id).where(Project.id == id)).scalar()
+        if owner is not None and not owns(owner):
+            return not_owner()
+        deleted = delete_records(Project, Project.id == id)
+        if not deleted:
             return jsonify({'success': False, 'message': 'Project not found'}), 404
-        
-        db.session.delete(project)
+
         db.session.commit()
+        invalidate_cached('projects', [deleted[0]['user_id']])
         return jsonify({'success': True, 'message': 'Project deleted successfully'})
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error deleting project: {str(e)}")
+        logger.error("Error deleting project: %s", e)
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
 @app.route('/api/internships', methods=['GET', 'POST'])
+@cached_list('internships')
 def handle_internships():
     try:
         if request.method == 'GET':
             user_id = request.args.get('user_id')
-            logger.info(f"Fetching internships for user_id: {user_id}")
+            logger.info("Fetching internships for user_id: %s", user_id, extra=SAMPLED)
             
             try:
-                if not user_id or user_id == '0' or user_id == 'all' or user_id == 'NaN':
-                    if request.args.get('view') == 'all':
-                        internships = Internship.query.all()
-                    else:
-                        return jsonify([])
-                else:
-                    internships = Internship.query.filter_by(user_id=int(user_id)).all()
-                
-                result = [{
-                    'id': i.id,
-                    'company': i.company,
-                    'position': i.position,
-                    'description': i.description,
-                    'start_date': i.start_date,
-                    'end_date': i.end_date,
-                    'user_id': i.user_id,
-                    'created_at': i.created_at.isoformat() if i.created_at else None,
-                    'updated_at': i.updated_at.isoformat() if i.updated_at else None,
-                    'user': {
-                        'id': i.user.id,
-                        'username': i.user.username,
-                        'role': i.user.role,
-                        'name': i.user.name
-                    } if i.user else None
-                } for i in internships]
-                
-                logger.info(f"Successfully fetched {len(result)} internships")
-                return jsonify(result)
+                if is_all_users(user_id) and request.args.get('view') != 'all':
+                    return jsonify([])
+                return list_records(Internship, Internship.start_date, {'company': Internship.company})
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
             except Exception as e:
-                logger.error(f"Error fetching internships: {str(e)}")
-                return jsonify([])
+                # Never a 200: an empty list here would be cached as if it were real
+                logger.error("Error fetching internships: %s", e)
+                return jsonify({'success': False, 'message': 'An error occurred'}), 500
                 
         elif request.method == 'POST':
             data = request.get_json()
@@ -386,8 +1560,12 @@ def handle_internships():
                 user_id=data.get('user_id')
             )
             
+            if not owns(internship.user_id):
+                return not_owner()
             db.session.add(internship)
+            analytics.record_created(db.session.connection(), 'internships', [record_values(internship)])
             db.session.commit()
+            invalidate_cached('internships', [internship.user_id])
             
             return jsonify({
                 'success': True,
@@ -397,23 +1575,85 @@ def handle_internships():
             
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error in internships: {str(e)}")
+        logger.error("Error in internships: %s", e)
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
+@app.route('/api/internships/bulk', methods=['POST'])
+def bulk_create_internships():
+    return handle_bulk_create(Internship)
+
+@app.route('/api/internships/bulk-delete', methods=['POST'])
+def bulk_delete_internships():
+    return handle_bulk_delete(Internship, Internship.start_date, {'company': Internship.company})
+
 @app.route('/api/internships/<int:id>', methods=['DELETE'])
 def delete_internship(id):
     try:
-        internship = db.session.get(Internship, id)
-        if not internship:
+        owner = db.session.execute(db.select(Internship.user_id).where(Internship.id == id)).scalar()
+        if owner is not None and not owns(owner):
+            return not_owner()
+        deleted = delete_records(Internship, Internship.id == id)
+        if not deleted:
             return jsonify({'success': False, 'message': 'Internship not found'}), 404
-        
-        db.session.delete(internship)
+
         db.session.commit()
+        invalidate_cached('internships', [deleted[0]['user_id']])
         return jsonify({'success': True, 'message': 'Internship deleted successfully'})
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error deleting internship: {str(e)}")
+        logger.error("Error deleting internship: %s", e)
+        return jsonify({'success': False, 'message': 'An error occurred'}), 500
+
+@app.route('/api/jobs', methods=['GET', 'POST'])
+def handle_jobs():
+    if not is_admin():
+        return jsonify({'success': False, 'message': 'Only administrators can queue or list jobs'}), 403
+    try:
+        if request.method == 'GET':
+            limit = max(1, min(request.args.get('limit', 20, type=int), JOB_LIST_MAX))
+            return jsonify(job_queue.recent(limit, request.args.get('created_by', type=int)))
+
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not data.get('type'):
+            return jsonify({'success': False, 'message': 'Missing job type'}), 400
+        job = job_queue.submit(data['type'], data.get('params', {}), current_user_id())
+        logger.info("Queued job %s (%s)", job['id'], job['type'])
+        return job_accepted(job)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.error("Error in jobs: %s", e)
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
+@app.route('/api/jobs/<int:id>', methods=['GET'])
+def get_job(id):
+    job = job_queue.get(id)
+    if job is None or not can_see_job(job):
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<int:id>/download', methods=['GET'])
+def download_job_file(id):
+    job = job_queue.get(id)
+    if job is None or job['type'] != 'export' or not can_see_job(job):
+        return jsonify({'success': False, 'message': 'Export not found'}), 404
+    if job['status'] != 'succeeded':
+        return jsonify({'success': False, 'message': f"Export is {job['status']}"}), 409
+    return send_from_directory(EXPORT_DIR, job['result']['file'], as_attachment=True)
+
+@app.cli.command('run-jobs')
+@click.option('--workers', default=2, show_default=True, help='Jobs to run at the same time.')
+def run_jobs_command(workers):
+    """Run background jobs in this process until interrupted."""
+    job_queue.workers = workers
+    job_queue.ensure_started()
+    click.echo(f'Running jobs with {workers} workers; press Ctrl+C to stop.')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        click.echo('Waiting for running jobs to finish...')
+        job_queue.stop()
+
 if __name__ == '__main__':
     app.run(debug=False)  # Disable debug mode in production 
\ No newline at end of file
@@ -0,0 +1,702 @@
+"""Benchmarks for the SVU Student Hub backend.
+
+Every benchmark runs against throwaway SQLite databases in a temporary
+directory, never against the application database.
+
+Usage:
+    python benchmark.py lookups --rows 10000 100000 1000000
+    python benchmark.py writes --clients 1 4 16 --journal-modes DELETE WAL
+    python benchmark.py login --clients 1 8 32 --hash-workers 0 4
+    python benchmark.py auth
+    python benchmark.py search --rows 1000000
+    python benchmark.py logging --clients 1 8
+    python benchmark.py serialize --rows 100000
+    python benchmark.py load --students 1000 --clients 1 8 32 --duration 10
+    python benchmark.py ratelimit
+
+Set BENCH_DATABASE_URL to run the app-level benchmarks against another
+database, e.g. a scratch PostgreSQL database.
+
+``load`` drives the API over real HTTP. By default it starts a threaded
+server in this process. To load a separately started server, seed its
+database first and point the clients at it:
+    BENCH_DATABASE_URL=sqlite:////tmp/load.db python benchmark.py load --seed-only
+    DATABASE_URL=sqlite:////tmp/load.db RATELIMIT_URL=none SERVER_PORT=8000 python serve.py &
+    python benchmark.py load --url http://127.0.0.1:8000
+"""
+import argparse
+import atexit
+import http.client
+import json
+import logging
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from sqlalchemy import create_engine, insert, select
+from werkzeug.serving import make_server
+from sqlalchemy.orm import Session, configure_mappers, contains_eager
+
+# Point the app at a scratch database before it is imported
+BENCH_DIR = tempfile.mkdtemp(prefix='svu-bench-')
+atexit.register(shutil.rmtree, BENCH_DIR, ignore_errors=True)
+os.environ['DATABASE_URL'] = os.environ.get(
+    'BENCH_DATABASE_URL', f"sqlite:///{os.path.join(BENCH_DIR, 'app.db')}")
+os.environ['SVU_SKIP_DB_INIT'] = '1'
+# Benchmarks send far more requests than the default limits allow
+os.environ.setdefault('RATELIMIT_URL', 'none')
+
+import analytics
+import logging_config
+import migrations
+import passwords
+import ratelimit
+import search
+import serializers
+from app import (app, authenticate, db, init_db, token_manager, LIST_SERIALIZERS,
+                 User, Certificate, Project, Internship)
+from init_db import SAMPLE_CERTIFICATES, SAMPLE_INTERNSHIPS, SAMPLE_PROJECTS
+
+STUDENTS_PER_10K_ROWS = 1000
+INSERT_BATCH_SIZE = 50000
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(label, samples, unit='ms'):
+    print(f"  {label:<28} p50={percentile(samples, 50):8.3f}{unit}  "
+          f"p95={percentile(samples, 95):8.3f}{unit}  "
+          f"p99={percentile(samples, 99):8.3f}{unit}  "
+          f"mean={statistics.mean(samples):8.3f}{unit}")
+
+def create_database(path):
+    engine = create_engine(f'sqlite:///{path}')
+    migrations.upgrade(engine, db.metadata)
+    return engine
+
+def seed_certificates(engine, rows):
+    """Insert ``rows`` certificates spread evenly over synthetic students."""
+    students = max(1, rows * STUDENTS_PER_10K_ROWS // 10000)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {'id': n, 'username': f'student{n}', 'password_hash': '!', 'role': 'student', 'name': f'Student {n}'}
+            for n in range(1, students + 1)
+        ])
+        for start in range(0, rows, INSERT_BATCH_SIZE):
+            connection.execute(insert(Certificate), [
+                {'title': f'Certificate {n}', 'issuer': f'Issuer {n % 50}',
+                 'date_issued': f'2023-{n % 12 + 1:02d}-01', 'user_id': n % students + 1}
+                for n in range(start, min(rows, start + INSERT_BATCH_SIZE))
+            ])
+    return students
+
+def drop_user_id_index(engine):
+    with engine.begin() as connection:
+        for index in Certificate.__table__.indexes:
+            if 'user_id' in index.columns:
+                index.drop(connection)
+
+def time_student_fetches(engine, students, samples):
+    """Time the per-student certificate query used by /api/certificates."""
+    timings = []
+    query = (select(Certificate).join(Certificate.user)
+             .options(contains_eager(Certificate.user)).order_by(Certificate.id))
+    with Session(engine) as session:
+        for _ in range(samples):
+            user_id = random.randint(1, students)
+            started = time.perf_counter()
+            session.execute(query.where(Certificate.user_id == user_id)).scalars().all()
+            timings.append((time.perf_counter() - started) * 1000)
+            session.expunge_all()
+    return timings
+
+def bench_lookups(args):
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_database(os.path.join(tmp, 'bench.db'))
+            started = time.perf_counter()
+            students = seed_certificates(engine, rows)
+            print(f"{rows} certificates, {students} students (seeded in {time.perf_counter() - started:.1f}s)")
+            report('indexed user_id', time_student_fetches(engine, students, args.samples))
+            if not args.skip_unindexed:
+                drop_user_id_index(engine)
+                report('unindexed user_id', time_student_fetches(engine, students, args.samples))
+            engine.dispose()
+
+def reset_app_database():
+    with app.app_context():
+        db.engine.dispose()
+    init_db(reset=True)
+    with app.app_context():
+        student = User(username='bench-student', role='student', name='Bench Student', password_hash='!')
+        db.session.add(student)
+        db.session.commit()
+        return student.id
+
+def run_clients(clients, requests_per_client, make_request):
+    """Run ``make_request(client, n)`` from concurrent test clients.
+
+    Returns (elapsed seconds, latencies in ms, number of failed requests).
+    """
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+
+    def worker():
+        client = app.test_client()
+        local_latencies, local_failures = [], 0
+        barrier.wait()
+        for n in range(requests_per_client):
+            started = time.perf_counter()
+            response = make_request(client, n)
+            local_latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                local_failures += 1
+        with lock:
+            latencies.extend(local_latencies)
+            failures.append(local_failures)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, sum(failures)
+
+def bench_writes(args):
+    is_sqlite = app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite')
+    for journal_mode in (args.journal_modes if is_sqlite else [None]):
+        if journal_mode:
+            app.config['SQLITE_JOURNAL_MODE'] = journal_mode
+            print(f"journal_mode={journal_mode}")
+        for clients in args.clients:
+            user_id = reset_app_database()
+
+            def create_certificate(client, n):
+                return client.post('/api/certificates', json={
+                    'title': f'Certificate {n}', 'issuer': 'Benchmark',
+                    'date_issued': '2024-01-01', 'user_id': user_id})
+
+            elapsed, latencies, failures = run_clients(clients, args.requests, create_certificate)
+            print(f"  {clients:>3} clients: {len(latencies) / elapsed:8.1f} writes/s, {failures} failed")
+            report('POST /api/certificates', latencies)
+
+def bench_login(args):
+    for workers in args.hash_workers:
+        passwords.configure(method=app.config['PASSWORD_HASH_METHOD'], workers=workers,
+                            max_pending=args.max_pending, timeout=app.config['PASSWORD_HASH_TIMEOUT'])
+        print(f"hash workers={workers or 'inline'} method={app.config['PASSWORD_HASH_METHOD']}")
+        reset_app_database()
+        with app.app_context():
+            password_hash = passwords.hash_password('password123')
+            db.session.execute(insert(User), [
+                {'username': f'login{n}', 'password_hash': password_hash, 'role': 'student', 'name': f'Student {n}'}
+                for n in range(max(args.clients))
+            ])
+            db.session.commit()
+
+        for clients in args.clients:
+            def login(client, n):
+                return client.post('/api/login', json={'username': f'login{n % clients}', 'password': 'password123'})
+
+            elapsed, latencies, failures = run_clients(clients, args.requests, login)
+            print(f"  {clients:>3} clients: {len(latencies) / elapsed:8.1f} logins/s, {failures} failed")
+            report('POST /api/login', latencies)
+        passwords.shutdown()
+
+def time_calls(func, iterations):
+    """Return the mean cost of ``func()`` in microseconds."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def bench_auth(args):
+    user = User(id=1, role='student')
+    token = token_manager.issue(user)
+
+    def verify_uncached():
+        token_manager.clear()
+        token_manager.verify(token)
+
+    print("token verification")
+    print(f"  {'uncached (HMAC + decode)':<28} {time_calls(verify_uncached, args.iterations):8.2f}us")
+    token_manager.verify(token)
+    print(f"  {'cached':<28} {time_calls(lambda: token_manager.verify(token), args.iterations):8.2f}us")
+
+    headers = {'Authorization': f'Bearer {token}'}
+    with app.test_request_context('/', headers=headers):
+        hook = time_calls(authenticate, args.iterations)
+    with app.test_request_context('/'):
+        baseline = time_calls(authenticate, args.iterations)
+    print("authenticate() request hook")
+    print(f"  {'no token':<28} {baseline:8.2f}us")
+    print(f"  {'cached token':<28} {hook:8.2f}us")
+
+# Named terms spread through a Zipf-distributed vocabulary of filler words,
+# so common and rare terms both occur as they do in real text
+SEARCH_TERMS = (
+    'python java react node data science machine learning cloud aws azure security '
+    'network database sql analytics design web mobile android ios testing devops '
+    'linux embedded robotics finance marketing research statistics visualization'
+).split()
+SEARCH_FILLER_WORDS = 20000
+SEARCH_ISSUERS = ['Coursera', 'Udacity', 'edX', 'NPTEL', 'Google', 'Microsoft', 'Cisco', 'Oracle']
+SEARCH_COMPANIES = ['Tech Solutions Inc.', 'Data Analytics Co.', 'Infosys', 'TCS', 'Wipro', 'Zoho', 'Amazon']
+SEARCH_QUERIES = ['python', 'python certificate', 'data science internship', 'machine learning',
+                  'cloud OR devops', 'react web project', 'secur*', 'robotics embedded linux']
+
+def search_vocabulary():
+    words = [f'word{n}' for n in range(SEARCH_FILLER_WORDS)]
+    for rank, term in enumerate(SEARCH_TERMS):
+        words.insert(rank * rank * 10, term)
+    cumulative, total = [], 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1 / rank
+        cumulative.append(total)
+    return words, cumulative
+
+def synthetic_text(rng, vocabulary, words):
+    return ' '.join(rng.choices(vocabulary[0], cum_weights=vocabulary[1], k=words))
+
+def seed_search_corpus(engine, rows, rng):
+    """Insert ``rows`` records split across the three collections.
+
+    The search triggers index every row as it is inserted, as they would
+    in production.
+    """
+    students = max(1, rows // 20)
+    vocabulary = search_vocabulary()
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {'id': n, 'username': f'student{n}', 'password_hash': '!', 'role': 'student', 'name': f'Student {n}'}
+            for n in range(1, students + 1)
+        ])
+        for start in range(0, rows, INSERT_BATCH_SIZE):
+            batch = range(start, min(rows, start + INSERT_BATCH_SIZE))
+            connection.execute(insert(Certificate), [
+                {'title': synthetic_text(rng, vocabulary, 3).title(), 'issuer': rng.choice(SEARCH_ISSUERS),
+                 'date_issued': '2023-01-01', 'user_id': n % students + 1}
+                for n in batch if n % 3 == 0
+            ])
+            connection.execute(insert(Project), [
+                {'title': synthetic_text(rng, vocabulary, 3).title(), 'description': synthetic_text(rng, vocabulary, 25),
+                 'start_date': '2023-01-01', 'end_date': '2023-06-30', 'user_id': n % students + 1}
+                for n in batch if n % 3 == 1
+            ])
+            connection.execute(insert(Internship), [
+                {'company': rng.choice(SEARCH_COMPANIES), 'position': synthetic_text(rng, vocabulary, 2).title() + ' Intern',
+                 'description': synthetic_text(rng, vocabulary, 25), 'start_date': '2023-01-01', 'end_date': '2023-06-30',
+                 'user_id': n % students + 1}
+                for n in batch if n % 3 == 2
+            ])
+
+def bench_search(args):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_database(os.path.join(tmp, 'bench.db'))
+        started = time.perf_counter()
+        seed_search_corpus(engine, args.rows, rng)
+        print(f"{args.rows} records indexed in {time.perf_counter() - started:.1f}s")
+        with engine.connect() as connection:
+            started = time.perf_counter()
+            with connection.begin():
+                search.rebuild_search_index(connection)
+            print(f"full index rebuild: {time.perf_counter() - started:.1f}s")
+            for query in SEARCH_QUERIES:
+                timings = []
+                for _ in range(args.samples):
+                    started = time.perf_counter()
+                    search.search(connection, query, limit=20)
+                    timings.append((time.perf_counter() - started) * 1000)
+                report(repr(query), timings)
+        engine.dispose()
+
+# label -> setup_logging arguments; 'off' keeps only warnings
+LOGGING_MODES = {
+    'off': dict(level='WARNING', use_queue=False),
+    'sync': dict(level='INFO', use_queue=False),
+    'sync, sampled': dict(level='INFO', use_queue=False, sample_every=10),
+    'queued': dict(level='INFO', use_queue=True),
+    'queued, sampled': dict(level='INFO', use_queue=True, sample_every=10),
+}
+
+def bench_logging(args):
+    user_id = reset_app_database()
+    with app.app_context():
+        db.session.execute(insert(Certificate), [
+            {'title': f'Certificate {n}', 'issuer': 'Benchmark', 'date_issued': '2024-01-01', 'user_id': user_id}
+            for n in range(args.records)
+        ])
+        db.session.commit()
+
+    def list_certificates(client, n):
+        # Streamed lists bypass the response cache, so every request logs
+        response = client.get(f'/api/certificates?user_id={user_id}&format=ndjson')
+        response.get_data()
+        response.close()
+        return response
+
+    log_path = os.path.join(BENCH_DIR, 'bench.log')
+    try:
+        for label, options in LOGGING_MODES.items():
+            with open(log_path, 'w') as stream:
+                logging_config.setup_logging(fmt=args.format, stream=stream, **options)
+                print(label)
+                for clients in args.clients:
+                    elapsed, latencies, failures = run_clients(clients, args.requests, list_certificates)
+                    print(f"  {clients:>3} clients: {len(latencies) / elapsed:8.1f} requests/s, {failures} failed")
+                    report('GET /api/certificates', latencies)
+                logging_config.stop_logging()
+    finally:
+        logging_config.setup_logging(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'],
+                                     app.config['LOG_QUEUE'], app.config['LOG_SAMPLE_EVERY'])
+
+def bench_serialize(args):
+    configure_mappers()
+    serializer = LIST_SERIALIZERS[Certificate]
+    orm_query = (select(Certificate).join(Certificate.user)
+                 .options(contains_eager(Certificate.user)).order_by(Certificate.id))
+    tuple_query = select(*serializer.columns).join(Certificate.user).order_by(Certificate.id)
+
+    def to_dict(session, offset):
+        records = session.execute(orm_query.offset(offset).limit(args.page)).scalars().all()
+        body = json.dumps([record.to_dict() for record in records]).encode()
+        session.expunge_all()
+        return body
+
+    def row_serializer(session, offset):
+        rows = session.execute(tuple_query.offset(offset).limit(args.page))
+        return serializers.dumps(serializer.serialize(rows))
+
+    methods = [('to_dict + json', None, to_dict), ('RowSerializer + json', 'json', row_serializer)]
+    if serializers.orjson is not None:
+        methods.append(('RowSerializer + orjson', 'orjson', row_serializer))
+    else:
+        print("orjson is not installed; skipping the orjson backend")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_database(os.path.join(tmp, 'bench.db'))
+        seed_certificates(engine, args.rows)
+        print(f"{args.rows} certificates, pages of {args.page} rows")
+        with Session(engine) as session:
+            for label, backend, serialize_page in methods:
+                serializers.configure(backend or 'json')
+                timings = []
+                for sample in range(args.samples):
+                    offset = sample * args.page % max(1, args.rows - args.page)
+                    started = time.perf_counter()
+                    serialize_page(session, offset)
+                    timings.append((time.perf_counter() - started) * 1000)
+                rows_per_second = args.page * len(timings) / (sum(timings) / 1000)
+                print(f"  {label:<26} {rows_per_second:10.0f} rows/s")
+                report('page', timings)
+        engine.dispose()
+    serializers.configure(app.config['JSON_BACKEND'])
+
+# Load test: synthetic students with records shaped like init_db.py's samples
+LOAD_PASSWORD = 'password123'
+LOAD_COLLECTIONS = {
+    'certificates': (Certificate, SAMPLE_CERTIFICATES),
+    'projects': (Project, SAMPLE_PROJECTS),
+    'internships': (Internship, SAMPLE_INTERNSHIPS),
+}
+LOAD_OPERATIONS = ('login', 'list', 'create', 'delete')
+
+def load_username(n):
+    return f'load{n}'
+
+def sample_record(samples, n, user_id):
+    record = dict(samples[n % len(samples)], user_id=user_id)
+    record['title' if 'title' in record else 'position'] += f' {n}'
+    return record
+
+def seed_load_data(students, per_student):
+    """Reset the app database and add ``students`` students with ``per_student`` records of each kind."""
+    reset_app_database()
+    with app.app_context():
+        password_hash = passwords.hash_password(LOAD_PASSWORD)
+        db.session.execute(insert(User), [
+            {'username': load_username(n), 'password_hash': password_hash, 'role': 'student', 'name': f'Load Student {n}'}
+            for n in range(students)
+        ])
+        user_ids = db.session.execute(select(User.id).where(User.username.like('load%'))).scalars().all()
+        for model, samples in LOAD_COLLECTIONS.values():
+            rows = [sample_record(samples, n, user_id) for user_id in user_ids for n in range(per_student)]
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                db.session.execute(insert(model), rows[start:start + INSERT_BATCH_SIZE])
+        analytics.rebuild(db.session.connection())
+        db.session.commit()
+
+def parse_mix(value):
+    """Parse ``login=1,list=16,...`` into (operations, weights)."""
+    weights = dict(part.split('=') for part in value.split(','))
+    unknown = set(weights) - set(LOAD_OPERATIONS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown operations: {', '.join(sorted(unknown))}")
+    return list(weights), [float(w) for w in weights.values()]
+
+class HttpClient:
+    """A keep-alive JSON client for one load-test user."""
+
+    def __init__(self, url):
+        parts = urllib.parse.urlsplit(url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+        self.prefix = parts.path.rstrip('/')
+        self.headers = {}
+
+    def request(self, method, path, body=None):
+        """Return (status, parsed JSON body); status 599 means the connection failed."""
+        headers = dict(self.headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, self.prefix + path, payload, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            return 599, None
+        is_json = response.getheader('Content-Type', '').startswith('application/json')
+        return response.status, json.loads(data) if is_json and data else None
+
+    def close(self):
+        self.connection.close()
+
+def run_load(url, clients, students, duration, mix, seed):
+    """Run ``clients`` concurrent users for ``duration`` seconds.
+
+    Returns (elapsed seconds, {operation: latencies in ms}, {operation: failures}).
+    """
+    operations, weights = mix
+    latencies = {op: [] for op in LOAD_OPERATIONS}
+    failures = dict.fromkeys(LOAD_OPERATIONS, 0)
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+
+    def worker(n):
+        rng = random.Random(seed + n)
+        client = HttpClient(url)
+        local_latencies = {op: [] for op in LOAD_OPERATIONS}
+        local_failures = dict.fromkeys(LOAD_OPERATIONS, 0)
+        state = {'user_id': None, 'created': []}
+
+        def timed(op, method, path, body=None):
+            started = time.perf_counter()
+            status, data = client.request(method, path, body)
+            local_latencies[op].append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                local_failures[op] += 1
+                return None
+            return data if data is not None else {}
+
+        def login():
+            data = timed('login', 'POST', '/api/login',
+                         {'username': load_username(n % students), 'password': LOAD_PASSWORD})
+            if data and data.get('success'):
+                state['user_id'] = data['user']['id']
+                client.headers['Authorization'] = f"Bearer {data['token']}"
+
+        def create():
+            collection = rng.choice(list(LOAD_COLLECTIONS))
+            record = sample_record(LOAD_COLLECTIONS[collection][1], rng.randrange(1000), state['user_id'])
+            data = timed('create', 'POST', f'/api/{collection}', record)
+            if data and data.get('id'):
+                state['created'].append((collection, data['id']))
+
+        def delete():
+            collection, record_id = state['created'].pop(rng.randrange(len(state['created'])))
+            timed('delete', 'DELETE', f'/api/{collection}/{record_id}')
+
+        def list_records():
+            collection = rng.choice(list(LOAD_COLLECTIONS))
+            timed('list', 'GET', f"/api/{collection}?user_id={state['user_id']}")
+
+        actions = {'login': login, 'list': list_records, 'create': create, 'delete': delete}
+        barrier.wait()
+        login()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            op = rng.choices(operations, weights)[0]
+            if state['user_id'] is None:
+                op = 'login'
+            elif op == 'delete' and not state['created']:
+                op = 'create'
+            actions[op]()
+        client.close()
+        with lock:
+            for op in LOAD_OPERATIONS:
+                latencies[op].extend(local_latencies[op])
+                failures[op] += local_failures[op]
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, failures
+
+def bench_load(args):
+    server = None
+    url = args.url
+    if url is None:
+        print(f"seeding {args.students} students with {args.records} records of each kind")
+        seed_load_data(args.students, args.records)
+        if args.seed_only:
+            return
+        # Keep the per-request access log out of the measurements
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.port}'
+        print(f"serving the app in-process at {url} (threaded werkzeug server)")
+
+    try:
+        for clients in args.clients:
+            elapsed, latencies, failures = run_load(url, clients, args.students, args.duration, args.mix, args.seed)
+            total = sum(len(samples) for samples in latencies.values())
+            print(f"  {clients:>3} clients: {total / elapsed:8.1f} requests/s, {sum(failures.values())} failed")
+            for op in LOAD_OPERATIONS:
+                if latencies[op]:
+                    report(f"{op} ({len(latencies[op]) / elapsed:.1f}/s, {failures[op]} failed)", latencies[op])
+    finally:
+        if server is not None:
+            server.shutdown()
+
+class SharedStandIn:
+    """Stands in for a Redis server in SharedBackend.
+
+    ``eval`` applies the token bucket of TOKEN_BUCKET_SCRIPT in-process,
+    optionally after a simulated network round trip.
+    """
+
+    def __init__(self, latency_ms=0):
+        self.buckets = ratelimit.MemoryBackend()
+        self.latency = latency_ms / 1000
+
+    def eval(self, script, numkeys, key, rate, burst, now):
+        if self.latency:
+            time.sleep(self.latency)
+        allowed, retry_after = self.buckets.take(key, rate, burst, now)
+        return [int(allowed), str(retry_after)]
+
+def bench_ratelimit(args):
+    import app as app_module
+
+    limit = ratelimit.Limit(10 ** 9, 1)
+    limiters = {
+        'off': None,
+        'memory': ratelimit.RateLimiter(ratelimit.MemoryBackend()),
+        'shared stand-in': ratelimit.RateLimiter(ratelimit.SharedBackend(SharedStandIn())),
+    }
+    if args.shared_latency_ms:
+        limiters[f'stand-in +{args.shared_latency_ms}ms'] = ratelimit.RateLimiter(
+            ratelimit.SharedBackend(SharedStandIn(args.shared_latency_ms)))
+
+    clients = [f'ip:10.0.{n // 256}.{n % 256}' for n in range(args.clients)]
+    print(f"RateLimiter.hit() over {args.clients} clients")
+    for label, limiter in limiters.items():
+        if limiter is not None:
+            hits = iter(range(10 ** 12))
+            cost = time_calls(lambda: limiter.hit('write', limit, clients[next(hits) % len(clients)]), args.iterations)
+            print(f"  {label:<28} {cost:8.2f}us")
+
+    print("guard_writes() request hook, POST /api/certificates")
+    saved = app_module.rate_limiter, app_module.RATE_LIMITS['write']
+    app_module.RATE_LIMITS['write'] = limit
+    try:
+        body = {'title': 'Benchmark', 'issuer': 'Benchmark', 'date_issued': '2024-01-01', 'user_id': 1}
+        with app.test_request_context('/api/certificates', method='POST', json=body):
+            authenticate()
+            for label, limiter in limiters.items():
+                app_module.rate_limiter = limiter
+                print(f"  {label:<28} {time_calls(app_module.guard_writes, args.iterations):8.2f}us")
+    finally:
+        app_module.rate_limiter, app_module.RATE_LIMITS['write'] = saved
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    lookups = subparsers.add_parser('lookups', help='per-student fetch latency by table size')
+    lookups.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    lookups.add_argument('--samples', type=int, default=200)
+    lookups.add_argument('--skip-unindexed', action='store_true',
+                         help='do not repeat the measurement without the user_id index')
+    lookups.set_defaults(func=bench_lookups)
+
+    writes = subparsers.add_parser('writes', help='certificate creation throughput under parallel clients')
+    writes.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    writes.add_argument('--requests', type=int, default=200, help='requests per client')
+    writes.add_argument('--journal-modes', nargs='+', default=['DELETE', 'WAL'])
+    writes.set_defaults(func=bench_writes)
+
+    login = subparsers.add_parser('login', help='login latency and throughput by concurrency')
+    login.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    login.add_argument('--requests', type=int, default=20, help='logins per client')
+    login.add_argument('--hash-workers', type=int, nargs='+', default=[0, os.cpu_count() or 1],
+                       help='hashing pool sizes to compare (0 hashes on the request thread)')
+    login.add_argument('--max-pending', type=int, default=256)
+    login.set_defaults(func=bench_login)
+
+    auth = subparsers.add_parser('auth', help='per-request cost of access token verification')
+    auth.add_argument('--iterations', type=int, default=100000)
+    auth.set_defaults(func=bench_auth)
+
+    search_parser = subparsers.add_parser('search', help='ranked full-text search latency')
+    search_parser.add_argument('--rows', type=int, default=1000000)
+    search_parser.add_argument('--samples', type=int, default=20)
+    search_parser.set_defaults(func=bench_search)
+
+    logging_parser = subparsers.add_parser('logging', help='request throughput by logging mode')
+    logging_parser.add_argument('--clients', type=int, nargs='+', default=[1, 8])
+    logging_parser.add_argument('--requests', type=int, default=500, help='requests per client')
+    logging_parser.add_argument('--records', type=int, default=20, help='certificates in each response')
+    logging_parser.add_argument('--format', choices=['text', 'json'], default='text')
+    logging_parser.set_defaults(func=bench_logging)
+
+    serialize = subparsers.add_parser('serialize', help='list serialization throughput by serializer')
+    serialize.add_argument('--rows', type=int, default=100000)
+    serialize.add_argument('--page', type=int, default=1000, help='rows per response')
+    serialize.add_argument('--samples', type=int, default=50)
+    serialize.set_defaults(func=bench_serialize)
+
+    load = subparsers.add_parser('load', help='mixed login/list/create/delete load over HTTP')
+    load.add_argument('--url', help='server to load (default: start one in this process)')
+    load.add_argument('--students', type=int, default=1000)
+    load.add_argument('--records', type=int, default=5, help='records of each kind per student')
+    load.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    load.add_argument('--duration', type=float, default=10, help='seconds per concurrency level')
+    load.add_argument('--mix', type=parse_mix, default='login=1,list=16,create=2,delete=1',
+                      help='relative weights of the operations')
+    load.add_argument('--seed', type=int, default=42, help='random seed for the clients')
+    load.add_argument('--seed-only', action='store_true',
+                      help='seed the database at BENCH_DATABASE_URL and exit')
+    load.set_defaults(func=bench_load)
+
+    ratelimit_parser = subparsers.add_parser('ratelimit', help='per-request cost of rate limiting')
+    ratelimit_parser.add_argument('--iterations', type=int, default=100000)
+    ratelimit_parser.add_argument('--clients', type=int, default=10000, help='distinct client keys')
+    ratelimit_parser.add_argument('--shared-latency-ms', type=float, default=0,
+                                  help='also time a stand-in with this simulated round trip')
+    ratelimit_parser.set_defaults(func=bench_ratelimit)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Response cache for the list endpoints.
+
+Cached responses are stored under keys that embed a *generation* number
+for the collection and owner they were built from. A write bumps the
+generation for the affected user and for the collection as a whole, so
+every response that could include the changed record stops matching,
+while cached responses for other users stay valid. No scanning for
+stale keys is needed, which also makes the scheme work with a shared
+cache server.
+
+Backends:
+    MemoryBackend  per-process LRU with per-entry TTL (the default)
+    SharedBackend  any client with redis-py's get/set/incr interface, so
+                   several worker processes see the same entries and
+                   invalidations
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+ALL_USERS = '*'
+
+class MemoryBackend:
+    """Thread-safe in-process LRU store with a TTL on every entry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Generations live outside the LRU: evicting one would reset it to
+        # zero and could resurrect entries cached under that old number.
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, name):
+        with self._lock:
+            return self._generations.get(name, 0)
+
+    def bump(self, name):
+        with self._lock:
+            self._generations[name] = self._generations.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class SharedBackend:
+    """Store entries in a cache server through a redis-py compatible client.
+
+    Eviction and expiry are left to the server. Generations are plain
+    integer keys, so INCR makes invalidation atomic across processes.
+    """
+
+    def __init__(self, client, prefix='svu:cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=max(1, int(ttl)))
+
+    def generation(self, name):
+        value = self.client.get(self.prefix + 'gen:' + name)
+        return int(value) if value is not None else 0
+
+    def bump(self, name):
+        self.client.incr(self.prefix + 'gen:' + name)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+class ResponseCache:
+    def __init__(self, backend, ttl=60):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def key(self, path, collection, owner, args):
+        """Build the cache key for a GET request.
+
+        ``owner`` is the user id the request is limited to, or ALL_USERS.
+        """
+        generation = self.backend.generation(f'{collection}:{owner}')
+        # Re-encode the values so an escaped '&' or '=' cannot collide with a real separator
+        query = urlencode(sorted(args.items(multi=True)))
+        return f'{path}?{query}#{generation}'
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value, self.ttl)
+
+    def invalidate(self, collection, user_ids):
+        """Drop cached responses that could contain records of ``user_ids``."""
+        for user_id in set(user_ids):
+            self.backend.bump(f'{collection}:{user_id}')
+        self.backend.bump(f'{collection}:{ALL_USERS}')
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'ttl': self.ttl
+            }
+        if isinstance(self.backend, MemoryBackend):
+            stats['entries'] = len(self.backend)
+        return stats
+
+def create_cache(url, ttl, max_entries):
+    """Create the cache described by ``url``, or None when caching is off.
+
+    ``memory://`` selects the in-process backend, ``redis://...`` a shared
+    Redis server (requires the redis package) and ``none`` disables caching.
+    """
+    if not url or url == 'none':
+        return None
+    if url.startswith('memory://'):
+        return ResponseCache(MemoryBackend(max_entries), ttl)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        import redis
+        return ResponseCache(SharedBackend(redis.Redis.from_url(url)), ttl)
+    raise ValueError(f"Unsupported CACHE_URL: {url}")
@@ -0,0 +1,44 @@
+"""Gunicorn settings, read from the same environment variables as config.py.
+
+The app is imported once in the master (``preload_app``), so migrations
+and default users are set up before any worker starts. The workers then
+share the master's SECRET_KEY. Each forked worker resets its
+per-process state in ``post_fork``. Defaults that are unsafe with several
+workers, such as the in-memory response cache, are adjusted first (see
+``config.apply_worker_defaults``).
+"""
+from config import Config, apply_worker_defaults
+
+# Must run before the app is imported (preload_app), which reads Config
+worker_notes = apply_worker_defaults(Config.SERVER_WORKERS)
+
+bind = f'{Config.SERVER_HOST}:{Config.SERVER_PORT}'
+workers = Config.SERVER_WORKERS
+threads = Config.SERVER_THREADS
+worker_class = 'gthread'
+timeout = Config.SERVER_TIMEOUT
+graceful_timeout = Config.SERVER_GRACEFUL_TIMEOUT
+keepalive = 5
+preload_app = True
+wsgi_app = 'wsgi:app'
+
+def on_starting(server):
+    for note in worker_notes:
+        server.log.warning(note)
+
+def pre_fork(server, worker):
+    import passwords
+    # A process pool started while importing the app must not be forked
+    passwords.shutdown()
+
+def post_fork(server, worker):
+    from wsgi import reset_after_fork
+    reset_after_fork()
+
+def worker_exit(server, worker):
+    import logging_config
+    import passwords
+    from app import job_queue
+    job_queue.stop(timeout=Config.SERVER_GRACEFUL_TIMEOUT)
+    passwords.shutdown()
+    logging_config.stop_logging()
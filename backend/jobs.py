@@ -0,0 +1,259 @@
+"""Background jobs for slow work: seeding, bulk imports and exports.
+
+Jobs are rows in the ``jobs`` table. A queued job survives a restart, and
+any worker process can pick it up. Each process runs a small pool of
+worker threads that claim queued jobs one at a time. A claim is a single
+UPDATE that only matches while the job is still queued, so two workers
+never run the same job. Submitting a job wakes the local workers
+immediately. Jobs queued by other processes are found on the next poll.
+Polls, and the sweep for lost jobs that runs every ``sweep_interval``
+seconds, first look with a read-only SELECT, so an idle queue never
+takes SQLite's write lock.
+
+A job whose process died stays 'running' until it has run for longer
+than ``timeout`` seconds, so jobs must finish within that time. Jobs
+still running when ``stop`` gives up on them are released at once. Either
+way, a job of a type registered with ``retry=True`` is queued again, up
+to ``max_attempts`` runs in total. Any other job is marked failed, because
+running it again could repeat work it already committed, such as an
+import.
+
+Handlers are registered with ``@handler('name')``. They are called as
+``func(job_id, params)`` inside an app context, and return a
+JSON-serializable result. The optional ``check`` function runs when a
+job is submitted, and raises ValueError for bad params.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, func, select, update
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+jobs = Table(
+    'jobs', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('type', String(20), nullable=False),
+    Column('status', String(10), nullable=False, default='queued'),
+    Column('params', Text, nullable=False),
+    Column('result', Text),
+    Column('error', Text),
+    Column('attempts', Integer, nullable=False, default=0),
+    Column('worker', String(64)),
+    Column('created_by', Integer),
+    Column('created_at', DateTime, nullable=False, default=datetime.utcnow),
+    Column('started_at', DateTime),
+    Column('finished_at', DateTime),
+    Index('ix_jobs_status_id', 'status', 'id'),
+)
+
+STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+# job type -> (handler, params check, safe to run again)
+HANDLERS = {}
+
+def handler(name, check=None, retry=False):
+    def register(func):
+        HANDLERS[name] = (func, check, retry)
+        return func
+    return register
+
+def retryable_types():
+    return [name for name, (func, check, retry) in HANDLERS.items() if retry]
+
+def to_dict(row):
+    """The public view of a job; params are left out as imports can be large."""
+    def timestamp(value):
+        return value.isoformat() if value else None
+    return {
+        'id': row.id,
+        'type': row.type,
+        'status': row.status,
+        'result': json.loads(row.result) if row.result else None,
+        'error': row.error,
+        'attempts': row.attempts,
+        'created_by': row.created_by,
+        'created_at': timestamp(row.created_at),
+        'started_at': timestamp(row.started_at),
+        'finished_at': timestamp(row.finished_at),
+    }
+
+class JobQueue:
+    def __init__(self, app, db, workers=2, poll_interval=2.0, timeout=3600, max_attempts=3, sweep_interval=60):
+        self.app = app
+        self.db = db
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.succeeded = 0
+        self.failed = 0
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._running = {}
+
+    @property
+    def engine(self):
+        with self.app.app_context():
+            return self.db.engine
+
+    def submit(self, job_type, params, created_by=None):
+        """Queue a job and return it; raises ValueError for unknown types or bad params."""
+        if job_type not in HANDLERS:
+            raise ValueError(f"type must be one of: {', '.join(sorted(HANDLERS))}")
+        if not isinstance(params, dict):
+            raise ValueError("params must be an object")
+        check = HANDLERS[job_type][1]
+        if check is not None:
+            check(params)
+        with self.engine.begin() as connection:
+            job_id = connection.execute(jobs.insert().values(
+                type=job_type, status='queued', params=json.dumps(params), created_by=created_by
+            )).inserted_primary_key[0]
+            row = connection.execute(select(jobs).where(jobs.c.id == job_id)).first()
+        self.ensure_started()
+        self._wakeup.set()
+        return to_dict(row)
+
+    def get(self, job_id):
+        with self.engine.connect() as connection:
+            row = connection.execute(select(jobs).where(jobs.c.id == job_id)).first()
+        return to_dict(row) if row is not None else None
+
+    def recent(self, limit=20, created_by=None):
+        query = select(jobs).order_by(jobs.c.id.desc()).limit(limit)
+        if created_by is not None:
+            query = query.where(jobs.c.created_by == created_by)
+        with self.engine.connect() as connection:
+            return [to_dict(row) for row in connection.execute(query)]
+
+    def counts(self):
+        with self.engine.connect() as connection:
+            counts = dict(connection.execute(select(jobs.c.status, func.count()).group_by(jobs.c.status)).all())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    def _exists(self, condition):
+        with self.engine.connect() as connection:
+            return connection.execute(select(jobs.c.id).where(condition).limit(1)).first() is not None
+
+    def claim(self, worker):
+        """Mark the oldest queued job as running by ``worker`` and return it, or None."""
+        if not self._exists(jobs.c.status == 'queued'):
+            return None
+        oldest = select(func.min(jobs.c.id)).where(jobs.c.status == 'queued').scalar_subquery()
+        with self.engine.begin() as connection:
+            return connection.execute(
+                update(jobs)
+                .where(jobs.c.id == oldest, jobs.c.status == 'queued')
+                .values(status='running', worker=worker, started_at=datetime.utcnow(),
+                        attempts=jobs.c.attempts + 1)
+                .returning(*jobs.c)
+            ).first()
+
+    def release(self, condition, error):
+        """Queue again, or fail with ``error``, the running jobs matching ``condition``."""
+        condition = (jobs.c.status == 'running') & condition
+        retry = jobs.c.type.in_(retryable_types()) & (jobs.c.attempts < self.max_attempts)
+        with self.engine.begin() as connection:
+            connection.execute(update(jobs).where(condition, retry).values(status='queued', worker=None))
+            connection.execute(update(jobs).where(condition, ~retry).values(
+                status='failed', error=error, worker=None, finished_at=datetime.utcnow()))
+
+    def requeue_stale(self):
+        """Release jobs left running for longer than ``timeout``, e.g. by a process that died."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.timeout)
+        if self._exists((jobs.c.status == 'running') & (jobs.c.started_at < cutoff)):
+            self.release(jobs.c.started_at < cutoff, 'Timed out')
+
+    def _finish(self, job_id, worker, status, result=None, error=None):
+        with self.engine.begin() as connection:
+            # Only the worker holding the job may finish it; a stale one was requeued
+            connection.execute(
+                update(jobs).where(jobs.c.id == job_id, jobs.c.worker == worker)
+                .values(status=status, result=result, error=error, finished_at=datetime.utcnow())
+            )
+        with self._lock:
+            if status == 'succeeded':
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def run_one(self, worker):
+        """Claim and run a single job; return False when the queue is empty."""
+        row = self.claim(worker)
+        if row is None:
+            return False
+        logger.info("Running job %s (%s), attempt %s", row.id, row.type, row.attempts)
+        self._running[worker] = row.id
+        try:
+            func = HANDLERS[row.type][0]
+            with self.app.app_context():
+                result = func(row.id, json.loads(row.params))
+            self._finish(row.id, worker, 'succeeded', result=json.dumps(result))
+            logger.info("Job %s (%s) succeeded", row.id, row.type)
+        except Exception as e:
+            logger.error("Job %s (%s) failed: %s", row.id, row.type, e)
+            self._finish(row.id, worker, 'failed', error=str(e) or type(e).__name__)
+        finally:
+            self._running.pop(worker, None)
+        return True
+
+    def _work(self, worker):
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                with self._lock:
+                    sweep = self._last_sweep + self.sweep_interval <= time.monotonic()
+                    if sweep:
+                        self._last_sweep = time.monotonic()
+                if sweep:
+                    self.requeue_stale()
+                while not self._stopping.is_set() and self.run_one(worker):
+                    pass
+            except Exception as e:
+                logger.error("Job worker %s error: %s", worker, e)
+            self._wakeup.wait(self.poll_interval)
+
+    def ensure_started(self):
+        """Start this process's workers, after startup or a fork."""
+        if self._pid == os.getpid() or not self.workers:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._work, args=(f'{os.getpid()}-{n}',),
+                                 name=f'job-worker-{n}', daemon=True)
+                for n in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def stop(self, timeout=None):
+        """Stop the workers, letting running jobs finish for up to ``timeout`` seconds."""
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        interrupted = list(self._running.items())
+        for worker, job_id in interrupted:
+            logger.warning("Job %s is still running at shutdown; releasing it", job_id)
+            self.release((jobs.c.id == job_id) & (jobs.c.worker == worker), 'Interrupted by shutdown')
+        self._threads = []
+        self._pid = None
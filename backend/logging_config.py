@@ -0,0 +1,123 @@
+"""Logging setup for the backend.
+
+Records are put on an in-memory queue and written by a background
+thread, so request threads never block on the log stream. Formatting,
+including the ``%``-style arguments of lazily formatted messages, also
+happens on that thread. A message filtered out by level is never
+formatted at all.
+
+High-volume lines can be sampled. Pass ``extra=SAMPLED`` and only one in
+every ``sample_every`` occurrences of that message is kept. Counting is
+per message template, so a rare message is not drowned out by a
+frequent one.
+
+``LOG_FORMAT=json`` writes one JSON object per line. The object holds
+the standard fields plus any ``extra`` fields passed to the logging
+call.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+SAMPLED = {'sampled': True}
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'sampled'}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every ``every`` records flagged with ``sampled``."""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.every == 1 or not getattr(record, 'sampled', False):
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % self.every:
+            return False
+        record.sample_rate = self.every
+        return True
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records without formatting them on the calling thread.
+
+    The stock QueueHandler merges ``args`` into the message up front so
+    records can be pickled. Our queue is in-process, so that work is left
+    to the listener. Arguments are therefore formatted a moment after the
+    call: don't log objects that are mutated right after logging them.
+    """
+
+    def prepare(self, record):
+        return record
+
+_listener = None
+
+def setup_logging(level='INFO', fmt='text', use_queue=True, sample_every=1, stream=None):
+    """Configure the root logger; safe to call again to reconfigure."""
+    global _listener
+    stop_logging()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.setLevel(level)
+
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        front = DeferredQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        front = handler
+    front.addFilter(SamplingFilter(sample_every))
+    root.addHandler(front)
+
+def restart_listener():
+    """Restart the background writer; its thread does not survive a fork."""
+    global _listener
+    if _listener is not None:
+        # The listener copied from the parent holds its dead thread, so
+        # start a fresh one on the same queue and handler
+        _listener = logging.handlers.QueueListener(
+            _listener.queue, *_listener.handlers, respect_handler_level=_listener.respect_handler_level)
+        _listener.start()
+
+def stop_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
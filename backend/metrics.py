@@ -0,0 +1,196 @@
+"""Request metrics and an opt-in profiler for slow requests.
+
+``init_app`` registers request hooks and SQLAlchemy engine events that
+record the following for every request:
+    - latency per route
+    - request and response body sizes
+    - number of SQL statements and the time spent in each
+``render`` exposes them in the Prometheus text format for /metrics.
+
+Metrics are kept per process. When running several workers, scrape each
+worker, or aggregate in the collector.
+
+When ``PROFILE_SLOW_REQUESTS_MS`` is set, each request runs under
+cProfile. Requests slower than the threshold log their hottest
+functions. Only one request is profiled at a time, and the others run
+unprofiled.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}
+
+    def observe(self, label_values, value):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, total, count) in sorted(self.series.items()):
+            labels = ','.join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            prefix = labels + ',' if labels else ''
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.request_latency = Histogram(
+            'svu_http_request_duration_seconds', 'Time spent handling requests.',
+            LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.request_size = Histogram(
+            'svu_http_request_size_bytes', 'Size of request bodies.', SIZE_BUCKETS, ('endpoint',))
+        self.response_size = Histogram(
+            'svu_http_response_size_bytes', 'Size of response bodies (streamed responses excluded).',
+            SIZE_BUCKETS, ('endpoint',))
+        self.query_count = Histogram(
+            'svu_db_queries_per_request', 'SQL statements executed per request.',
+            QUERY_COUNT_BUCKETS, ('endpoint',))
+        self.query_latency = Histogram(
+            'svu_db_query_duration_seconds', 'Time spent in individual SQL statements.',
+            LATENCY_BUCKETS, ('endpoint',))
+        self.collectors = []
+
+    def observe_request(self, endpoint, method, status, duration, request_bytes, response_bytes, queries):
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.request_latency.observe((endpoint, method), duration)
+            self.request_size.observe((endpoint,), request_bytes)
+            if response_bytes is not None:
+                self.response_size.observe((endpoint,), response_bytes)
+            self.query_count.observe((endpoint,), len(queries))
+            for query_duration in queries:
+                self.query_latency.observe((endpoint,), query_duration)
+
+    def add_collector(self, collector):
+        """Register a callable returning extra ``(name, type, help, value)`` samples."""
+        self.collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            lines = ['# HELP svu_http_requests_total Requests handled.', '# TYPE svu_http_requests_total counter']
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'svu_http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+            for histogram in (self.request_latency, self.request_size, self.response_size,
+                              self.query_count, self.query_latency):
+                lines.extend(histogram.render())
+        for collector in self.collectors:
+            for name, metric_type, help_text, value in collector():
+                lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}', f'{name} {value}'])
+        return '\n'.join(lines) + '\n'
+
+class SlowRequestProfiler:
+    def __init__(self, threshold_ms, top=25):
+        self.threshold = threshold_ms / 1000
+        self.top = top
+        self._active = threading.Lock()
+
+    def start(self):
+        if not self._active.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already installed
+            self._active.release()
+            return None
+        return profiler
+
+    def abandon(self, profiler):
+        profiler.disable()
+        self._active.release()
+
+    def stop(self, profiler, duration, description):
+        self.abandon(profiler)
+        if duration < self.threshold:
+            return
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(self.top)
+        logger.warning("Slow request %s took %.1fms; top functions:\n%s",
+                       description, duration * 1000, output.getvalue())
+
+def init_app(app, metrics, profile_threshold_ms=0):
+    profiler = SlowRequestProfiler(profile_threshold_ms) if profile_threshold_ms else None
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Kept on the per-statement context rather than the pooled connection,
+        # so a statement that raises (and never reaches after_cursor_execute)
+        # leaves nothing behind
+        if context is not None:
+            context.metrics_started = time.perf_counter()
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'metrics_started', None)
+        if started is None:
+            return
+        if has_request_context() and 'metrics_queries' in g:
+            g.metrics_queries.append(time.perf_counter() - started)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = []
+        g.metrics_profiler = profiler.start() if profiler else None
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        if g.get('metrics_profiler') is not None:
+            profiler.stop(g.metrics_profiler, duration, f"{request.method} {request.full_path}")
+            g.metrics_profiler = None
+        metrics.observe_request(
+            request.endpoint or 'unmatched',
+            request.method,
+            response.status_code,
+            duration,
+            request.content_length or 0,
+            None if response.is_streamed else response.calculate_content_length(),
+            g.pop('metrics_queries', [])
+        )
+        return response
+
+    @app.teardown_request
+    def release_profiler(exc):
+        # after_request does not run when a view raises; never leave the profiler on
+        if g.get('metrics_profiler') is not None:
+            profiler.abandon(g.metrics_profiler)
+            g.metrics_profiler = None
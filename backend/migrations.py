@@ -0,0 +1,104 @@
+"""Versioned schema migrations for the SVU Student Hub database.
+
+Each migration is a function that receives an open connection and the
+application's metadata. Applied versions are recorded in the
+``schema_migrations`` table, so ``upgrade`` only runs what a database is
+missing and is safe to call on every start.
+
+To change the schema, update the models in app.py and append a new
+migration that brings an existing database up to date.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+
+import analytics
+import jobs
+import search
+import tombstones
+
+logger = logging.getLogger(__name__)
+
+tracking_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', tracking_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, default=datetime.utcnow),
+)
+
+MIGRATIONS = []
+
+def migration(version, description):
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+def create_indexes(connection, metadata, table_names):
+    for name in table_names:
+        for index in metadata.tables[name].indexes:
+            index.create(connection, checkfirst=True)
+
+@migration(1, 'Initial schema')
+def initial_schema(connection, metadata):
+    tables = [metadata.tables[name] for name in ('users', 'certificates', 'projects', 'internships')]
+    metadata.create_all(connection, tables=tables, checkfirst=True)
+
+@migration(2, 'Index foreign keys and filter columns')
+def add_filter_indexes(connection, metadata):
+    create_indexes(connection, metadata, ('certificates', 'projects', 'internships'))
+
+@migration(3, 'Full-text search index')
+def add_search_index(connection, metadata):
+    if search.is_available(connection):
+        search.create_search_index(connection)
+        search.rebuild_search_index(connection)
+
+@migration(4, 'Analytics rollup tables')
+def add_rollup_tables(connection, metadata):
+    analytics.metadata.create_all(connection, checkfirst=True)
+    analytics.rebuild(connection)
+
+@migration(5, 'Tombstones for delta sync and updated_at indexes')
+def add_tombstones(connection, metadata):
+    tombstones.metadata.create_all(connection, checkfirst=True)
+    create_indexes(connection, metadata, ('certificates', 'projects', 'internships'))
+
+@migration(6, 'Background job queue')
+def add_jobs_table(connection, metadata):
+    jobs.metadata.create_all(connection, checkfirst=True)
+
+@migration(7, 'Index tombstones by deletion time')
+def add_tombstone_prune_index(connection, metadata):
+    create_indexes(connection, tombstones.metadata, ('tombstones',))
+
+def current_version(connection):
+    tracking_metadata.create_all(connection, checkfirst=True)
+    versions = connection.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+def upgrade(engine, metadata):
+    """Apply every migration newer than the database's current version."""
+    with engine.begin() as connection:
+        version = current_version(connection)
+        pending = [m for m in MIGRATIONS if m[0] > version]
+        for number, description, func in pending:
+            logger.info("Applying migration %s: %s", number, description)
+            func(connection, metadata)
+            connection.execute(schema_migrations.insert().values(
+                version=number, description=description))
+        return pending
+
+def reset(engine, metadata):
+    """Drop every application table along with the migration history."""
+    with engine.begin() as connection:
+        if search.is_available(connection):
+            search.drop_search_index(connection)
+        analytics.metadata.drop_all(connection)
+        tombstones.metadata.drop_all(connection)
+        jobs.metadata.drop_all(connection)
+        metadata.drop_all(connection)
+        tracking_metadata.drop_all(connection)
@@ -0,0 +1,92 @@
+"""Password hashing that runs outside the request threads.
+
+Hashing and checking passwords is deliberately slow. Running it on the
+request thread lets a burst of logins hold the GIL and tie up every
+worker thread. Here the work goes to a small process pool instead, and
+the request thread only waits for the result. The number of requests
+waiting for the pool is capped: past that, ``HashingBusy`` is raised so
+the caller can answer 503 right away rather than queue without limit.
+
+Set ``workers`` to 0 to hash on the calling thread (useful for tests and
+one-off scripts).
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+class HashingBusy(Exception):
+    """Raised when too many password operations are already waiting."""
+
+_settings = {
+    'method': 'scrypt:32768:8:1',
+    'workers': 0,
+    'timeout': 10,
+}
+_slots = threading.BoundedSemaphore(1)
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_method_prefix = None
+
+def configure(method, workers, max_pending, timeout):
+    """Set the hashing parameters; takes effect for subsequent calls."""
+    global _slots, _method_prefix
+    shutdown()
+    _settings.update(method=method, workers=workers, timeout=timeout)
+    _slots = threading.BoundedSemaphore(max(1, max_pending))
+    _method_prefix = None
+
+def shutdown():
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _executor_pid = None
+
+def _get_executor():
+    """Return this process's pool, creating it after startup or a fork."""
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=_settings['workers'])
+            _executor_pid = os.getpid()
+        return _executor
+
+def _run(func, *args):
+    if not _settings['workers']:
+        return func(*args)
+    # Fail at once rather than wait for a slot, so request threads never pile up here
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy("Too many password operations in progress")
+    try:
+        future = _get_executor().submit(func, *args)
+        try:
+            return future.result(timeout=_settings['timeout'])
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingBusy("Password operation timed out")
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool next time and answer this call inline
+        shutdown()
+        return func(*args)
+    finally:
+        _slots.release()
+
+def hash_password(password):
+    return _run(generate_password_hash, password, _settings['method'])
+
+def verify_password(pwhash, password):
+    return _run(check_password_hash, pwhash, password)
+
+def needs_rehash(pwhash):
+    """Tell whether ``pwhash`` was made with parameters other than the configured ones."""
+    global _method_prefix
+    if _method_prefix is None:
+        # Werkzeug fills in default parameters for short method names such
+        # as 'scrypt', so learn the full prefix from a throwaway hash
+        _method_prefix = hash_password('').split('$', 1)[0]
+    return pwhash.split('$', 1)[0] != _method_prefix
@@ -0,0 +1,162 @@
+"""Token-bucket rate limiting for the login and write endpoints.
+
+Every client gets one bucket per rule. A bucket holds up to ``burst``
+tokens and refills at ``rate`` tokens per second. Each request takes one
+token. When the bucket is empty the request is refused, and the caller
+is told how many seconds until the next token arrives. Short bursts up
+to the full limit are allowed, and the long-run rate is capped.
+
+Backends:
+    MemoryBackend  per-process buckets (the default). Each worker process
+                   enforces the limit separately, so with N workers a
+                   client can get up to N times the limit.
+    SharedBackend  buckets kept in a Redis-compatible server and updated
+                   by a Lua script, so every worker draws on the same
+                   bucket. Any client with redis-py's ``eval`` works.
+
+If the shared server is unreachable, requests are let through rather
+than failing the API.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+class Limit:
+    """``count`` requests per ``period`` seconds, with bursts of up to ``count``."""
+
+    def __init__(self, count, period):
+        self.burst = count
+        self.rate = count / period
+
+    @classmethod
+    def parse(cls, text):
+        """Parse e.g. ``10/minute``; returns None for an empty or zero limit."""
+        if not text or text.strip() in ('0', 'none'):
+            return None
+        try:
+            count, unit = text.strip().split('/')
+            count = int(count)
+            period = PERIODS[unit.strip().rstrip('s')]
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid rate limit {text!r}; expected e.g. '10/minute'")
+        return cls(count, period) if count > 0 else None
+
+class MemoryBackend:
+    """Thread-safe in-process buckets, keeping the ``max_keys`` most recent clients."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        """Take a token; return (allowed, seconds until a token is available)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - stamp) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # An evicted client simply starts again with a full bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after == 0.0, retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+# KEYS[1] = bucket; ARGV = rate, burst, now (seconds). Returns {allowed, retry_after}.
+# Floats are returned as strings because Redis truncates Lua numbers to integers.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or burst
+local stamp = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+class SharedBackend:
+    """Buckets in a Redis-compatible server, updated atomically by a Lua script."""
+
+    def __init__(self, client, prefix='svu:ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    def take(self, key, rate, burst, now=None):
+        now = time.time() if now is None else now
+        allowed, retry_after = self.client.eval(TOKEN_BUCKET_SCRIPT, 1, self.prefix + key, rate, burst, now)
+        return bool(int(allowed)), float(retry_after)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def hit(self, rule, limit, client):
+        """Count a request by ``client`` against ``rule``; return (allowed, retry_after)."""
+        try:
+            allowed, retry_after = self.backend.take(f'{rule}:{client}', limit.rate, limit.burst)
+        except Exception as e:
+            logger.warning("Rate limit backend failed, letting the request through: %s", e)
+            with self._lock:
+                self.errors += 1
+            return True, 0.0
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.limited += 1
+        return allowed, retry_after
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'allowed': self.allowed, 'limited': self.limited, 'errors': self.errors}
+
+def create_limiter(url, max_keys=100000):
+    """Create the limiter described by ``url``, or None when rate limiting is off.
+
+    ``memory://`` selects the in-process backend, ``redis://...`` a shared
+    Redis server (requires the redis package) and ``none`` disables limits.
+    """
+    if not url or url == 'none':
+        return None
+    if url.startswith('memory://'):
+        return RateLimiter(MemoryBackend(max_keys))
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        import redis
+        return RateLimiter(SharedBackend(redis.Redis.from_url(url)))
+    raise ValueError(f"Unsupported RATELIMIT_URL: {url}")
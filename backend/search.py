@@ -0,0 +1,107 @@
+"""Full-text search over certificates, projects and internships.
+
+The index is an SQLite FTS5 table with one row per record. It is kept in
+sync by triggers on the source tables, so every path that writes them
+updates the index in the same transaction: single creates, bulk
+imports, deletes and user cascades.
+
+The kind column is indexed as well, so "python certificate" matches
+certificates that mention Python.
+
+Each index row's rowid is derived from the record's kind and id
+(``id * 4 + kind code``). Removing a record from the index is then a
+primary-key delete rather than a scan of the FTS table.
+
+Search needs SQLite with FTS5. On other databases ``is_available``
+returns False and the API answers 501.
+"""
+import re
+
+from sqlalchemy import text
+
+# kind -> (code, table, title expression, body expression)
+SOURCES = {
+    'certificate': (1, 'certificates', "{row}.title", "{row}.issuer"),
+    'project': (2, 'projects', "{row}.title", "{row}.description"),
+    'internship': (3, 'internships', "{row}.position || ' at ' || {row}.company", "{row}.description"),
+}
+KIND_CODES = 4
+OPERATORS = {'AND', 'OR', 'NOT'}
+TOKEN = re.compile(r'[\w][\w\-\.\+#]*\*?', re.UNICODE)
+
+def is_available(connection):
+    return connection.dialect.name == 'sqlite'
+
+def create_search_index(connection):
+    connection.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "kind, record_id UNINDEXED, user_id UNINDEXED, title, body, "
+        "tokenize = 'porter unicode61')"
+    ))
+    for kind, (code, table, title, body) in SOURCES.items():
+        def values(row):
+            return (f"{row}.id * {KIND_CODES} + {code}, '{kind}', {row}.id, {row}.user_id, "
+                    f"{title.format(row=row)}, {body.format(row=row)}")
+        remove = f"DELETE FROM search_index WHERE rowid = OLD.id * {KIND_CODES} + {code};"
+        add = f"INSERT INTO search_index (rowid, kind, record_id, user_id, title, body) VALUES ({values('NEW')});"
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN {add} END"))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN {remove} END"))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE ON {table} BEGIN {remove} {add} END"))
+
+def drop_search_index(connection):
+    for _, table, _, _ in SOURCES.values():
+        for event in ('insert', 'delete', 'update'):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_search_{event}"))
+    connection.execute(text("DROP TABLE IF EXISTS search_index"))
+
+def rebuild_search_index(connection):
+    """Repopulate the index from the source tables in one pass per table."""
+    connection.execute(text("DELETE FROM search_index"))
+    for kind, (code, table, title, body) in SOURCES.items():
+        connection.execute(text(
+            f"INSERT INTO search_index (rowid, kind, record_id, user_id, title, body) "
+            f"SELECT id * {KIND_CODES} + {code}, '{kind}', id, user_id, "
+            f"{title.format(row=table)}, {body.format(row=table)} FROM {table}"
+        ))
+    connection.execute(text("INSERT INTO search_index (search_index) VALUES ('optimize')"))
+
+def build_match_query(query):
+    """Turn user input into a safe FTS5 MATCH expression.
+
+    Words are quoted so punctuation cannot break the query syntax; a
+    trailing ``*`` keeps prefix matching, and AND/OR/NOT pass through as
+    operators. Words are ANDed by default.
+    """
+    terms = []
+    for token in TOKEN.findall(query):
+        if token in OPERATORS:
+            if terms and terms[-1] not in OPERATORS:
+                terms.append(token)
+            continue
+        prefix = token.endswith('*')
+        word = token.rstrip('*').replace('"', '""')
+        terms.append(f'"{word}"' + ('*' if prefix else ''))
+    while terms and terms[-1] in OPERATORS:
+        terms.pop()
+    return ' '.join(terms)
+
+def search(connection, query, kind=None, user_id=None, limit=20, offset=0):
+    """Return ranked matches as dicts, best first."""
+    match = build_match_query(query)
+    if not match:
+        return []
+    sql = ("SELECT kind, record_id, user_id, title, "
+           "snippet(search_index, 4, '[', ']', '...', 12) AS snippet, bm25(search_index) AS score "
+           "FROM search_index WHERE search_index MATCH :match")
+    params = {'match': match, 'limit': limit, 'offset': offset}
+    if kind:
+        sql += " AND kind = :kind"
+        params['kind'] = kind
+    if user_id is not None:
+        sql += " AND user_id = :user_id"
+        params['user_id'] = user_id
+    sql += " ORDER BY score LIMIT :limit OFFSET :offset"
+    return [dict(row._mapping) for row in connection.execute(text(sql), params)]
@@ -0,0 +1,98 @@
+"""Fast serialization of records for the list and portfolio endpoints.
+
+Building a response from ORM objects costs an object per row, a
+``to_dict`` call with an ``isoformat`` per timestamp and a fresh user
+dict per row. A ``RowSerializer`` instead selects only the columns the
+response needs, as plain tuples, and converts each tuple with a function
+compiled once per model. The embedded user dict is built once per user
+and shared by all of that user's rows. The output has the same shape as
+``Model.to_dict()``.
+
+``dumps`` encodes with orjson when it is installed (``pip install
+orjson``) and falls back to the standard library otherwise.
+"""
+import json
+
+from sqlalchemy import DateTime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+USER_FIELDS = ('id', 'username', 'role', 'name')
+
+_backend = 'orjson' if orjson is not None else 'json'
+
+def configure(backend='auto'):
+    """Select the JSON encoder: 'auto', 'orjson' or 'json'."""
+    global _backend
+    if backend == 'auto':
+        backend = 'orjson' if orjson is not None else 'json'
+    if backend not in ('orjson', 'json'):
+        raise ValueError(f"Unsupported JSON backend: {backend}")
+    if backend == 'orjson' and orjson is None:
+        raise ValueError("The orjson backend requires the orjson package")
+    _backend = backend
+
+def backend():
+    return _backend
+
+def dumps(obj):
+    """Encode ``obj`` as compact JSON bytes."""
+    if _backend == 'orjson':
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+def _compile(name, fields, timestamps, user_fields):
+    """Build ``convert(row, users)`` turning a result tuple into a dict.
+
+    The dict is written out as a literal with fixed tuple positions, which
+    is markedly faster than zipping names and values for every row.
+    """
+    items = []
+    for i, field in enumerate(fields):
+        value = f"row[{i}]"
+        if field in timestamps:
+            value = f"(row[{i}].isoformat() if row[{i}] is not None else None)"
+        items.append(f"{field!r}: {value}")
+    if user_fields:
+        offset = len(fields)
+        user = ', '.join(f"{field!r}: row[{offset + i}]" for i, field in enumerate(user_fields))
+        items.append(f"'user': users.get(row[{offset}]) or users.setdefault(row[{offset}], {{{user}}})")
+    source = f"def convert_{name}(row, users):\n    return {{{', '.join(items)}}}\n"
+    namespace = {}
+    exec(compile(source, f'<serializer {name}>', 'exec'), namespace)
+    return namespace[f'convert_{name}']
+
+class RowSerializer:
+    """Serialize ``model`` rows selected as tuples of ``columns``.
+
+    ``fields`` are the model's attribute names in output order. With
+    ``user_model`` the user's summary fields are selected too and nested
+    under 'user'; the query must join the user table.
+    """
+
+    def __init__(self, model, fields, user_model=None):
+        self.fields = tuple(fields)
+        table = model.__table__
+        timestamps = {f for f in self.fields if isinstance(table.c[f].type, DateTime)}
+        self.columns = [getattr(model, f) for f in self.fields]
+        user_fields = ()
+        if user_model is not None:
+            user_fields = USER_FIELDS
+            self.columns += [getattr(user_model, f) for f in user_fields]
+        self._convert = _compile(table.name, self.fields, timestamps, user_fields)
+
+    def serialize(self, rows):
+        """Convert an iterable of result tuples into a list of dicts."""
+        convert = self._convert
+        users = {}
+        return [convert(row, users) for row in rows]
+
+    def iter_serialize(self, rows):
+        """Like ``serialize``, but lazily, for streaming."""
+        convert = self._convert
+        users = {}
+        for row in rows:
+            yield convert(row, users)
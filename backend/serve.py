@@ -0,0 +1,93 @@
+"""Run the backend under a production WSGI server.
+
+    python serve.py
+
+``SERVER`` selects the server (see config.py). By default it picks the
+first one installed:
+    gunicorn   SERVER_WORKERS processes with SERVER_THREADS threads each
+               (Linux and macOS; settings in gunicorn.conf.py)
+    waitress   one process with SERVER_THREADS threads (any platform)
+    werkzeug   one process with a thread per request; the fallback when
+               neither of the others is installed
+
+Each server stops accepting connections on SIGTERM or Ctrl+C and lets
+in-flight requests finish before exiting. gunicorn waits up to
+SERVER_GRACEFUL_TIMEOUT seconds, waitress up to 5 seconds, and werkzeug
+until they are done. Background jobs that are running get the same
+SERVER_GRACEFUL_TIMEOUT; one cut short is retried later (see jobs.py).
+
+``python run.py`` still starts the Flask development server with the
+debugger and reloader; never expose that one.
+"""
+import importlib.util
+import logging
+import os
+import signal
+import sys
+import threading
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SERVERS = ('gunicorn', 'waitress', 'werkzeug')
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def is_installed(name):
+    if name == 'gunicorn' and os.name == 'nt':
+        return False
+    return importlib.util.find_spec(name) is not None
+
+def choose_server(name):
+    if name == 'auto':
+        return next(server for server in SERVERS if is_installed(server))
+    if name not in SERVERS:
+        raise SystemExit(f"SERVER must be one of: auto, {', '.join(SERVERS)}")
+    if not is_installed(name):
+        raise SystemExit(f"SERVER={name} is not installed")
+    return name
+
+def run_gunicorn():
+    # Replace this process so the gunicorn master receives signals directly
+    os.chdir(HERE)
+    os.execv(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'])
+
+def run_waitress():
+    from waitress import serve
+    from app import job_queue
+    from wsgi import app
+
+    # waitress finishes running requests when the serving loop exits with SystemExit
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        serve(app, host=Config.SERVER_HOST, port=Config.SERVER_PORT, threads=Config.SERVER_THREADS)
+    finally:
+        job_queue.stop(timeout=Config.SERVER_GRACEFUL_TIMEOUT)
+
+def run_werkzeug():
+    from werkzeug.serving import make_server
+    from app import job_queue
+    from wsgi import app
+
+    server = make_server(Config.SERVER_HOST, Config.SERVER_PORT, app, threaded=True)
+    # Track request threads so server_close() waits for them instead of abandoning them
+    server.daemon_threads = False
+
+    def stop(signum, frame):
+        # shutdown() blocks until serve_forever() returns, so it can't run on this thread
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("Serving on http://%s:%s", Config.SERVER_HOST, server.port)
+    server.serve_forever()
+    logger.info("Shutting down; waiting for in-flight requests")
+    server.server_close()
+    job_queue.stop(timeout=Config.SERVER_GRACEFUL_TIMEOUT)
+
+def main():
+    server = choose_server(Config.SERVER)
+    {'gunicorn': run_gunicorn, 'waitress': run_waitress, 'werkzeug': run_werkzeug}[server]()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Point the app at a throwaway database before any test imports it."""
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix='svu-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(_db_dir, 'test.db')}",
+    'CACHE_URL': 'none',
+    'RATELIMIT_URL': 'none',
+    'JOBS_WORKERS': '0',
+    'PASSWORD_HASH_WORKERS': '0',
+    'LOG_QUEUE': '0',
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+_usernames = itertools.count()
+
+@pytest.fixture(autouse=True)
+def empty_database():
+    """Start every test from a freshly migrated, empty database."""
+    import migrations
+    from app import app, db, upgrade_schema
+    with app.app_context():
+        db.session.remove()
+        migrations.reset(db.engine, db.metadata)
+        upgrade_schema()
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+@pytest.fixture
+def make_users():
+    """Create users with unique names and return their ids."""
+    from app import User, app, db
+
+    def make(count=1, role='student'):
+        with app.app_context():
+            users = [User(username=f'{role}-{next(_usernames)}', role=role, name='Test User', password_hash='x')
+                     for _ in range(count)]
+            db.session.add_all(users)
+            db.session.commit()
+            return [user.id for user in users]
+    return make
+
+@pytest.fixture
+def auth_headers():
+    """Return the Authorization header for a token issued to ``user_id``."""
+    from app import token_manager
+
+    def headers(user_id, role='student'):
+        token = token_manager.issue(SimpleNamespace(id=user_id, role=role))
+        return {'Authorization': f'Bearer {token}'}
+    return headers
+
+@pytest.fixture
+def admin_headers(make_users, auth_headers):
+    return auth_headers(make_users(role='admin')[0], role='admin')
+
+def certificate(user_id, **fields):
+    return dict({'title': 'Web Development', 'issuer': 'Coursera', 'date_issued': '2024-01-15',
+                 'user_id': user_id}, **fields)
+
+def sample(model, number, user_id):
+    """A valid record of ``model`` for ``user_id``."""
+    from app import Certificate, Project
+    if model is Certificate:
+        return {'title': f'Certificate {number}', 'issuer': 'Coursera',
+                'date_issued': '2024-01-15', 'user_id': user_id}
+    if model is Project:
+        return {'title': f'Project {number}', 'description': 'A project',
+                'start_date': '2024-01-01', 'end_date': '2024-06-30', 'user_id': user_id}
+    return {'company': 'Tech Solutions Inc.', 'position': f'Intern {number}', 'description': 'An internship',
+            'start_date': '2024-05-01', 'end_date': '2024-08-31', 'user_id': user_id}
@@ -0,0 +1,46 @@
+"""Token handling and who may write whose records."""
+from conftest import certificate
+
+BAD_TOKEN = {'Authorization': 'Bearer not-a-token'}
+
+def test_stale_token_does_not_block_login(client):
+    response = client.post('/api/login', json={}, headers=BAD_TOKEN)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Missing username or password'
+
+def test_stale_token_is_rejected_elsewhere(client):
+    assert client.get('/api/certificates', headers=BAD_TOKEN).status_code == 401
+
+def test_student_creates_only_own_records(client, make_users, auth_headers):
+    student, other = make_users(2)
+    headers = auth_headers(student)
+    assert client.post('/api/certificates', json=certificate(student), headers=headers).status_code == 200
+    assert client.post('/api/certificates', json=certificate(str(student)), headers=headers).status_code == 200
+    response = client.post('/api/certificates', json=certificate(other), headers=headers)
+    assert response.status_code == 403
+    project = {'title': 'Portfolio', 'description': 'Site', 'start_date': '2024-01-01', 'user_id': other}
+    assert client.post('/api/projects', json=project, headers=headers).status_code == 403
+
+def test_admin_and_anonymous_create_for_anyone(client, make_users, admin_headers):
+    student, = make_users()
+    assert client.post('/api/certificates', json=certificate(student), headers=admin_headers).status_code == 200
+    assert client.post('/api/certificates', json=certificate(student)).status_code == 200
+
+def test_student_bulk_import_rejects_other_users_rows(client, make_users, auth_headers):
+    student, other = make_users(2)
+    response = client.post('/api/certificates/bulk', json=[certificate(student), certificate(other)],
+                           headers=auth_headers(student))
+    body = response.get_json()
+    assert body['created'] == 1
+    assert body['errors'] == [{'row': 2, 'message': 'You can only import your own records'}]
+
+def test_student_deletes_only_own_records(client, make_users, auth_headers, admin_headers):
+    student, other = make_users(2)
+    own = client.post('/api/certificates', json=certificate(student)).get_json()['id']
+    theirs = client.post('/api/certificates', json=certificate(other)).get_json()['id']
+    headers = auth_headers(student)
+
+    assert client.delete(f'/api/certificates/{theirs}', headers=headers).status_code == 403
+    assert client.delete(f'/api/certificates/{own}', headers=headers).status_code == 200
+    assert client.delete(f'/api/certificates/{own}', headers=headers).status_code == 404
+    assert client.delete(f'/api/certificates/{theirs}', headers=admin_headers).status_code == 200
@@ -0,0 +1,109 @@
+"""Bulk deletes and user deletion, and what they leave behind in stats, search and syncs."""
+from datetime import datetime, timedelta
+
+import pytest
+
+import analytics
+from app import app, db
+from conftest import certificate
+
+def add_certificate(client, user_id, **fields):
+    return client.post('/api/certificates', json=certificate(user_id, **fields)).get_json()['id']
+
+def certificate_ids(client):
+    return sorted(record['id'] for record in client.get('/api/certificates?user_id=all').get_json())
+
+def bulk_delete(client, headers, body):
+    return client.post('/api/certificates/bulk-delete', json=body, headers=headers)
+
+def test_delete_by_ids_reports_missing_ones(client, make_users, admin_headers):
+    user_id, = make_users()
+    first, second, kept = (add_certificate(client, user_id) for _ in range(3))
+    response = bulk_delete(client, admin_headers, {'ids': [first, second, 9999]})
+    assert response.get_json() == {'success': True, 'deleted': 2, 'not_found': [9999]}
+    assert certificate_ids(client) == [kept]
+
+def test_filters_are_combined(client, make_users, admin_headers):
+    user_id, other = make_users(2)
+    match = add_certificate(client, user_id, issuer='Udemy', date_issued='2023-03-01')
+    kept = [
+        add_certificate(client, user_id, issuer='Udemy', date_issued='2024-03-01'),
+        add_certificate(client, user_id, issuer='Coursera', date_issued='2023-03-01'),
+        add_certificate(client, other, issuer='Udemy', date_issued='2023-03-01'),
+    ]
+    response = bulk_delete(client, admin_headers, {'user_ids': [user_id], 'issuer': 'Udemy',
+                                                   'date_from': '2023-01-01', 'date_to': '2023-12-31'})
+    assert response.get_json() == {'success': True, 'deleted': 1}
+    assert match not in certificate_ids(client)
+    assert certificate_ids(client) == sorted(kept)
+
+def test_delete_by_role(client, make_users, admin_headers):
+    student, = make_users()
+    teacher, = make_users(role='teacher')
+    kept = add_certificate(client, student)
+    add_certificate(client, teacher)
+    assert bulk_delete(client, admin_headers, {'role': 'teacher'}).get_json()['deleted'] == 1
+    assert certificate_ids(client) == [kept]
+
+@pytest.mark.parametrize('body', [{}, {'role': ''}, {'ids': []}, {'ids': ['1']}, ['1']])
+def test_refuses_to_delete_without_a_filter(client, make_users, admin_headers, body):
+    user_id, = make_users()
+    add_certificate(client, user_id)
+    assert bulk_delete(client, admin_headers, body).status_code == 400
+    assert len(certificate_ids(client)) == 1
+
+def test_only_admins_bulk_delete(client, make_users, auth_headers):
+    user_id, = make_users()
+    record_id = add_certificate(client, user_id)
+    for headers in (auth_headers(user_id), {}):
+        assert bulk_delete(client, headers, {'ids': [record_id]}).status_code == 403
+        assert client.post('/api/users/bulk-delete', json={'ids': [user_id]}, headers=headers).status_code == 403
+        assert client.delete(f'/api/users/{user_id}', headers=headers).status_code == 403
+    assert certificate_ids(client) == [record_id]
+
+def add_portfolio(client, user_id, word):
+    """One record of each kind for ``user_id``, all findable by searching for ``word``."""
+    return {
+        'certificates': [client.post('/api/certificates', json=certificate(user_id, title=f'{word} course')).get_json()['id']],
+        'projects': [client.post('/api/projects', json={
+            'title': f'{word} app', 'description': 'A project', 'start_date': '2024-02-01',
+            'end_date': '2024-06-30', 'user_id': user_id}).get_json()['id']],
+        'internships': [client.post('/api/internships', json={
+            'company': f'{word} Labs', 'position': 'Intern', 'description': 'An internship',
+            'start_date': '2024-05-01', 'end_date': '2024-08-31', 'user_id': user_id}).get_json()['id']],
+    }
+
+def search(client, word):
+    return client.get(f'/api/search?q={word}').get_json()['results']
+
+def test_deleting_a_user_removes_their_records_everywhere(client, make_users, admin_headers):
+    removed, kept = make_users(2)
+    since = (datetime.utcnow() - timedelta(seconds=30)).isoformat()
+    records = add_portfolio(client, removed, 'Zyzzyva')
+    add_portfolio(client, kept, 'Quokka')
+    assert len(search(client, 'Zyzzyva')) == 3
+
+    response = client.delete(f'/api/users/{removed}', headers=admin_headers)
+    assert response.get_json() == {'success': True, 'deleted': 1, 'not_found': [],
+                                    'records_deleted': {name: 1 for name in records}}
+    assert client.delete(f'/api/users/{removed}', headers=admin_headers).status_code == 404
+
+    assert search(client, 'Zyzzyva') == []
+    assert len(search(client, 'Quokka')) == 3
+
+    stats = client.get('/api/stats').get_json()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            analytics.rebuild(connection)
+    assert client.get('/api/stats').get_json() == stats
+
+    for name, ids in records.items():
+        body = client.get(f'/api/{name}?user_id=all&view=all&updated_since={since}').get_json()
+        assert [(record['id'], record['user_id']) for record in body['deleted']] == [(ids[0], removed)]
+        assert all(item['user_id'] == kept for item in body['items'])
+
+def test_bulk_user_delete_reports_missing_ones(client, make_users, admin_headers):
+    first, second = make_users(2)
+    response = client.post('/api/users/bulk-delete', json={'ids': [first, second, 9999]}, headers=admin_headers)
+    body = response.get_json()
+    assert (body['deleted'], body['not_found']) == (2, [9999])
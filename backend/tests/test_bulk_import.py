@@ -0,0 +1,30 @@
+"""Bad rows in a bulk import are reported one by one, never as a failed batch."""
+from conftest import certificate
+
+def test_wrongly_typed_fields_are_row_errors(client, make_users):
+    user_id, = make_users()
+    rows = [
+        certificate(user_id),
+        certificate(user_id, title={'a': 1}),
+        certificate(user_id, issuer=5, date_issued=['2024-01-15']),
+        certificate(user_id=True),
+        certificate(user_id=1.5),
+        certificate(str(user_id)),
+    ]
+    response = client.post('/api/certificates/bulk', json=rows)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['created'] == 2
+    assert body['errors'] == [
+        {'row': 2, 'message': 'title must be text'},
+        {'row': 3, 'message': 'issuer, date_issued must be text'},
+        {'row': 4, 'message': 'User ID must be an integer'},
+        {'row': 5, 'message': 'User ID must be an integer'},
+    ]
+
+def test_project_description_object_is_a_row_error(client, make_users):
+    user_id, = make_users()
+    rows = [{'title': 'Site', 'description': {'a': 1}, 'start_date': '2024-01-01', 'user_id': user_id}]
+    response = client.post('/api/projects/bulk', json=rows)
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'row': 1, 'message': 'description must be text'}]
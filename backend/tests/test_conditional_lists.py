@@ -0,0 +1,73 @@
+"""ETag / Last-Modified revalidation and ``updated_since`` syncs of the list endpoints."""
+from datetime import datetime, timedelta
+
+from werkzeug.http import http_date
+
+from app import TOMBSTONE_RETENTION, Certificate, User, app, db
+from conftest import certificate
+
+def list_url(user_id, **args):
+    query = ''.join(f'&{name}={value}' for name, value in args.items())
+    return f'/api/certificates?user_id={user_id}{query}'
+
+def age_records(seconds):
+    """Move every user's and certificate's updated_at back, as if written ``seconds`` ago."""
+    with app.app_context():
+        for model in (User, Certificate):
+            db.session.execute(db.update(model).values(updated_at=datetime.utcnow() - timedelta(seconds=seconds)))
+        db.session.commit()
+
+def test_unchanged_list_is_not_modified(client, make_users):
+    user_id, = make_users()
+    client.post('/api/certificates', json=certificate(user_id))
+    etag = client.get(list_url(user_id)).headers['ETag']
+    response = client.get(list_url(user_id), headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+def test_etag_changes_after_create_and_delete(client, make_users):
+    user_id, = make_users()
+    first = client.get(list_url(user_id)).headers['ETag']
+    record_id = client.post('/api/certificates', json=certificate(user_id)).get_json()['id']
+    created = client.get(list_url(user_id)).headers['ETag']
+    client.delete(f'/api/certificates/{record_id}')
+    deleted = client.get(list_url(user_id)).headers['ETag']
+    assert len({first, created, deleted}) == 3
+    assert client.get(list_url(user_id), headers={'If-None-Match': created}).status_code == 200
+
+def test_no_last_modified_within_the_current_second(client, make_users):
+    user_id, = make_users()
+    client.post('/api/certificates', json=certificate(user_id))
+    assert 'Last-Modified' not in client.get(list_url(user_id)).headers
+
+def test_if_modified_since(client, make_users):
+    user_id, = make_users()
+    client.post('/api/certificates', json=certificate(user_id))
+    age_records(10)
+    last_modified = client.get(list_url(user_id)).headers['Last-Modified']
+    assert client.get(list_url(user_id), headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    client.post('/api/certificates', json=certificate(user_id))
+    assert client.get(list_url(user_id), headers={'If-Modified-Since': last_modified}).status_code == 200
+    earlier = http_date(datetime.utcnow() - timedelta(minutes=1))
+    assert client.get(list_url(user_id), headers={'If-Modified-Since': earlier}).status_code == 200
+
+def test_updated_since_returns_changes_and_deletions(client, make_users):
+    user_id, = make_users()
+    old, removed = (client.post('/api/certificates', json=certificate(user_id)).get_json()['id'] for _ in range(2))
+    age_records(60)
+    since = (datetime.utcnow() - timedelta(seconds=30)).isoformat()
+    new = client.post('/api/certificates', json=certificate(user_id)).get_json()['id']
+    client.delete(f'/api/certificates/{removed}')
+
+    body = client.get(list_url(user_id, updated_since=since)).get_json()
+    assert [item['id'] for item in body['items']] == [new]
+    assert [(record['id'], record['user_id']) for record in body['deleted']] == [(removed, user_id)]
+    assert old not in [item['id'] for item in body['items']]
+    assert datetime.fromisoformat(body['server_time']) < datetime.utcnow()
+
+def test_updated_since_older_than_deletion_history_is_gone(client, make_users):
+    user_id, = make_users()
+    since = (datetime.utcnow() - TOMBSTONE_RETENTION - timedelta(hours=1)).isoformat()
+    assert client.get(list_url(user_id, updated_since=since)).status_code == 410
+    assert client.get(list_url(user_id, updated_since='yesterday')).status_code == 400
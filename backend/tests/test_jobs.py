@@ -0,0 +1,18 @@
+"""The /api/jobs endpoints."""
+import pytest
+
+from app import job_queue
+
+@pytest.mark.parametrize('limit', ['-1', '0', '1'])
+def test_job_list_limit_is_at_least_one(client, admin_headers, limit):
+    for _ in range(3):
+        job_queue.submit('export', {'collection': 'certificates'})
+    response = client.get(f'/api/jobs?limit={limit}', headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.get_json()) == 1
+
+def test_only_admins_list_and_queue_jobs(client, make_users, auth_headers):
+    headers = auth_headers(make_users()[0])
+    assert client.get('/api/jobs', headers=headers).status_code == 403
+    body = {'type': 'export', 'params': {'collection': 'certificates'}}
+    assert client.post('/api/jobs', json=body, headers=headers).status_code == 403
@@ -0,0 +1,104 @@
+"""Keyset pagination of the list endpoints: no row skipped or repeated, whatever the sort."""
+from datetime import datetime
+
+import pytest
+
+from app import NEXT_CURSOR_HEADER, Certificate, app, bulk_create, db
+
+# Duplicate sort values, some with the comma that separates a cursor's value from its id
+DATES = ['2024-01-15', 'Spring, 2023', '2024-01-15', 'Spring, 2023', '2022-09-01']
+CREATED = [datetime(2024, 3, 1, 12, 0, 0, 250000), datetime(2024, 3, 1, 12, 0, 0, 250000), datetime(2024, 2, 1)]
+SORTS = ['id', '-id', 'date', '-date', 'created_at', '-created_at']
+
+@pytest.fixture
+def record_ids(make_users):
+    """Fifteen certificates sharing a handful of dates and creation times."""
+    user_id, = make_users()
+    rows = [{'title': f'Certificate {n}', 'issuer': 'Coursera', 'date_issued': DATES[n % len(DATES)],
+             'user_id': user_id} for n in range(15)]
+    with app.app_context():
+        created, errors = bulk_create(Certificate, rows)
+        assert not errors
+        ids = db.session.execute(db.select(Certificate.id).order_by(Certificate.id)).scalars().all()
+        for n, record_id in enumerate(ids):
+            db.session.execute(db.update(Certificate).where(Certificate.id == record_id)
+                               .values(created_at=CREATED[n % len(CREATED)]))
+        db.session.commit()
+    return ids
+
+def get(client, sort, **args):
+    response = client.get('/api/certificates', query_string=dict(user_id='all', sort=sort, **args))
+    assert response.status_code == 200, response.get_json()
+    return response
+
+def pages(client, sort, limit, between_pages=None):
+    """Follow the cursors to the end and return the ids in the order served."""
+    ids, args = [], {}
+    while True:
+        response = get(client, sort, limit=limit, **args)
+        page = [record['id'] for record in response.get_json()]
+        assert len(page) <= limit
+        ids += page
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+        if between_pages:
+            between_pages(page)
+        args = {'after_id': cursor}
+
+def unpaged(client, sort):
+    return [record['id'] for record in get(client, sort).get_json()]
+
+@pytest.mark.parametrize('sort', SORTS)
+@pytest.mark.parametrize('limit', [1, 2, 4])
+def test_pages_cover_every_row_once(client, record_ids, sort, limit):
+    ids = pages(client, sort, limit)
+    assert ids == unpaged(client, sort)
+    assert sorted(ids) == record_ids
+
+@pytest.mark.parametrize('sort', SORTS)
+def test_deleting_the_cursor_row_between_pages(client, record_ids, sort):
+    expected = unpaged(client, sort)
+    deleted = []
+
+    def delete_last(page):
+        client.delete(f'/api/certificates/{page[-1]}')
+        deleted.append(page[-1])
+
+    ids = pages(client, sort, 3, delete_last)
+    assert ids == expected
+    assert unpaged(client, sort) == [record_id for record_id in expected if record_id not in deleted]
+
+def test_descending_ties_are_broken_by_descending_id(client, record_ids):
+    served = get(client, '-date').get_json()
+    keys = [(record['date_issued'], record['id']) for record in served]
+    assert keys == sorted(keys, reverse=True)
+
+def test_cursor_value_may_contain_commas(client, record_ids):
+    response = get(client, 'date', limit=10)
+    assert response.headers[NEXT_CURSOR_HEADER].startswith('Spring, 2023,')
+    assert [r['id'] for r in get(client, 'date', after_id=response.headers[NEXT_CURSOR_HEADER]).get_json()] \
+        == unpaged(client, 'date')[10:]
+
+def test_created_at_cursor_keeps_microseconds(client, record_ids):
+    response = get(client, '-created_at', limit=1)
+    assert response.headers[NEXT_CURSOR_HEADER].startswith('2024-03-01T12:00:00.250000,')
+
+@pytest.mark.parametrize('sort', ['date', '-created_at'])
+def test_bare_id_cursor_looks_up_the_sort_value(client, record_ids, sort):
+    expected = unpaged(client, sort)
+    after = get(client, sort, after_id=expected[4]).get_json()
+    assert [record['id'] for record in after] == expected[5:]
+
+@pytest.mark.parametrize('args', [
+    {'sort': 'date', 'after_id': '9999'},
+    {'sort': 'title'},
+    {'sort': 'id', 'after_id': 'abc'},
+    {'sort': 'date', 'after_id': '2024-01-15,abc'},
+    {'sort': 'created_at', 'after_id': 'yesterday,3'},
+    {'sort': 'id', 'limit': '0'},
+    {'sort': 'id', 'limit': '-1'},
+    {'sort': 'id', 'limit': 'ten'},
+])
+def test_malformed_paging_is_rejected(client, record_ids, args):
+    assert client.get('/api/certificates', query_string=dict(user_id='all', **args)).status_code == 400
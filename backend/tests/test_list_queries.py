@@ -0,0 +1,50 @@
+"""The list endpoints must issue the same number of SQL statements however many rows they return."""
+import pytest
+from sqlalchemy import event
+
+from app import Certificate, Internship, Project, User, app, bulk_create, db
+from conftest import sample
+
+LIST_URLS = {
+    Certificate: '/api/certificates?user_id=all',
+    Project: '/api/projects?user_id=all&view=all',
+    Internship: '/api/internships?user_id=all&view=all',
+}
+
+def add_records(model, count):
+    """Add ``count`` records, each owned by a new student."""
+    with app.app_context():
+        start = db.session.query(User).count()
+        users = [User(username=f'{model.__tablename__}-{start + n}', role='student', name='Student', password_hash='x')
+                 for n in range(count)]
+        db.session.add_all(users)
+        db.session.commit()
+        created, errors = bulk_create(model, [sample(model, n, user.id) for n, user in enumerate(users)])
+        assert len(created) == count and not errors
+
+def count_statements(url):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = app.test_client().get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return len(response.get_json()), len(statements)
+
+@pytest.mark.parametrize('model', list(LIST_URLS), ids=lambda model: model.__tablename__)
+def test_list_query_count_does_not_grow_with_rows(model):
+    add_records(model, 5)
+    small_rows, small_statements = count_statements(LIST_URLS[model])
+    add_records(model, 45)
+    large_rows, large_statements = count_statements(LIST_URLS[model])
+
+    assert (small_rows, large_rows) == (5, 50)
+    assert small_statements > 0
+    assert large_statements == small_statements
@@ -0,0 +1,27 @@
+"""The queued log writer, as restarted in forked workers."""
+import io
+import logging
+
+import pytest
+
+import logging_config
+
+@pytest.fixture
+def root_handlers():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    logging_config.stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+def test_restarted_listener_writes_queued_records(root_handlers):
+    stream = io.StringIO()
+    logging_config.setup_logging(stream=stream)
+    first = logging_config._listener
+    first.stop()  # as after a fork, where the parent's thread is gone
+    logging_config.restart_listener()
+    assert logging_config._listener is not first
+    logging.getLogger('svu.test').info("after restart %s", 1)
+    logging_config.stop_logging()
+    assert 'after restart 1' in stream.getvalue()
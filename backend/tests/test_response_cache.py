@@ -0,0 +1,74 @@
+"""Which writes invalidate which cached list responses."""
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import app as app_module
+from cache import create_cache
+from conftest import certificate
+
+@pytest.fixture(autouse=True)
+def response_cache(monkeypatch):
+    cache = create_cache('memory://', 60, 1024)
+    monkeypatch.setattr(app_module, 'response_cache', cache)
+    return cache
+
+def cache_state(client, *user_ids):
+    """X-Cache of GET /api/certificates for each user id (or 'all')."""
+    return [client.get(f'/api/certificates?user_id={user_id}').headers.get('X-Cache') for user_id in user_ids]
+
+def warm(client, *user_ids):
+    cache_state(client, *user_ids)
+    assert cache_state(client, *user_ids) == ['HIT'] * len(user_ids)
+
+def test_keys_are_per_user_and_for_all_users(client, make_users):
+    first, second = make_users(2)
+    assert cache_state(client, first, first) == ['MISS', 'HIT']
+    assert cache_state(client, second, 'all', 'all') == ['MISS', 'MISS', 'HIT']
+
+def create(client, user_id, other_id, admin_headers):
+    assert client.post('/api/certificates', json=certificate(user_id)).status_code == 200
+
+def bulk_import(client, user_id, other_id, admin_headers):
+    response = client.post('/api/certificates/bulk', json=[certificate(user_id), certificate(user_id)])
+    assert response.get_json()['created'] == 2
+
+def delete(client, user_id, other_id, admin_headers):
+    with app_module.app.app_context():
+        record_id = app_module.db.session.execute(
+            app_module.db.select(app_module.Certificate.id).where(app_module.Certificate.user_id == user_id)).scalar()
+    assert client.delete(f'/api/certificates/{record_id}').status_code == 200
+
+def bulk_delete(client, user_id, other_id, admin_headers):
+    response = client.post('/api/certificates/bulk-delete', json={'user_ids': [user_id]}, headers=admin_headers)
+    assert response.get_json()['deleted'] == 1
+
+def delete_user(client, user_id, other_id, admin_headers):
+    assert client.delete(f'/api/users/{user_id}', headers=admin_headers).status_code == 200
+
+@pytest.mark.parametrize('write', [create, bulk_import, delete, bulk_delete, delete_user],
+                         ids=lambda write: write.__name__)
+def test_write_invalidates_owner_and_all_users_only(client, make_users, admin_headers, write):
+    owner, other = make_users(2)
+    client.post('/api/certificates', json=certificate(owner))
+    client.post('/api/certificates', json=certificate(other))
+    warm(client, owner, other, 'all')
+
+    write(client, owner, other, admin_headers)
+    assert cache_state(client, owner, other, 'all') == ['MISS', 'HIT', 'MISS']
+
+def test_failed_list_is_not_cached(client, make_users, monkeypatch):
+    user_id, = make_users()
+    client.post('/api/certificates', json=certificate(user_id))
+
+    def locked(*args, **kwargs):
+        raise OperationalError('SELECT', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(app_module, 'list_records', locked)
+    response = client.get(f'/api/certificates?user_id={user_id}')
+    assert response.status_code == 500
+    monkeypatch.undo()
+    monkeypatch.setattr(app_module, 'response_cache', create_cache('memory://', 60, 1024))
+
+    response = client.get(f'/api/certificates?user_id={user_id}')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert len(response.get_json()) == 1
@@ -0,0 +1,24 @@
+"""The row serializers must produce exactly what the models' ``to_dict()`` does."""
+import pytest
+
+from app import LIST_SERIALIZERS, PORTFOLIO_SERIALIZERS, Certificate, app, bulk_create, db
+from conftest import sample
+
+@pytest.mark.parametrize('model', list(LIST_SERIALIZERS), ids=lambda model: model.__tablename__)
+def test_serializers_match_to_dict(make_users, model):
+    user_ids = make_users(2) + make_users(role='teacher')
+    rows = [sample(model, n, user_ids[n % len(user_ids)]) for n in range(6)]
+    if model is Certificate:
+        rows[0]['issuer'] = 'Ünïcode "quoted" issuer'
+    with app.app_context():
+        created, errors = bulk_create(model, rows)
+        assert not errors
+        records = db.session.query(model).order_by(model.id).all()
+
+        listed = db.session.query(*LIST_SERIALIZERS[model].columns).select_from(model) \
+            .join(model.user).order_by(model.id)
+        assert LIST_SERIALIZERS[model].serialize(listed) == [record.to_dict() for record in records]
+
+        portfolio = db.session.query(*PORTFOLIO_SERIALIZERS[model].columns).order_by(model.id)
+        assert PORTFOLIO_SERIALIZERS[model].serialize(portfolio) \
+            == [record.to_dict(include_user=False) for record in records]
@@ -0,0 +1,63 @@
+"""Tombstones for deleted records, for clients that sync with ``updated_since``.
+
+A client that polls a list with ``updated_since`` gets the rows changed
+after that time. Rows that were deleted are no longer there to return.
+The delete handlers therefore call ``record_deleted`` in their own
+transaction, which leaves a tombstone with the record's id, owner and
+deletion time. ``deleted_since`` returns the tombstones a client has not
+seen yet.
+
+Tombstones older than the retention period are pruned. A client whose
+last sync is older than that must refetch the full list.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, delete, func, select
+
+metadata = MetaData()
+
+tombstones = Table(
+    'tombstones', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('collection', String(20), nullable=False),
+    Column('record_id', Integer, nullable=False),
+    Column('user_id', Integer, nullable=False),
+    Column('deleted_at', DateTime, nullable=False, default=datetime.utcnow),
+    Index('ix_tombstones_collection_deleted_at', 'collection', 'deleted_at'),
+    Index('ix_tombstones_user_id', 'user_id'),
+    # Lets ``prune``, which runs on every delete, find only the expired rows
+    Index('ix_tombstones_deleted_at', 'deleted_at'),
+)
+
+def record_deleted(connection, collection, records):
+    """Leave a tombstone per record; ``records`` are dicts with 'id' and 'user_id'."""
+    rows = [{'collection': collection, 'record_id': r['id'], 'user_id': r['user_id']} for r in records]
+    if rows:
+        connection.execute(tombstones.insert(), rows)
+
+def prune(connection, before):
+    """Drop tombstones for deletions before ``before``."""
+    connection.execute(delete(tombstones).where(tombstones.c.deleted_at < before))
+
+def _scope(query, collection, user_id):
+    query = query.where(tombstones.c.collection == collection)
+    if user_id is not None:
+        query = query.where(tombstones.c.user_id == user_id)
+    return query
+
+def deleted_since(connection, collection, since, user_id=None):
+    """Return the records of ``collection`` deleted after ``since``, oldest first."""
+    query = _scope(select(tombstones.c.record_id, tombstones.c.user_id, tombstones.c.deleted_at),
+                   collection, user_id)
+    query = query.where(tombstones.c.deleted_at > since).order_by(tombstones.c.id)
+    return [
+        {'id': record_id, 'user_id': owner, 'deleted_at': deleted_at.isoformat()}
+        for record_id, owner, deleted_at in connection.execute(query)
+    ]
+
+def latest(collection, user_id=None):
+    """Scalar subqueries for the newest tombstone's id and time, for change detection."""
+    return [
+        _scope(select(func.max(tombstones.c.id)), collection, user_id).scalar_subquery(),
+        _scope(select(func.max(tombstones.c.deleted_at)), collection, user_id).scalar_subquery(),
+    ]
@@ -0,0 +1,23 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Use ``python serve.py`` to pick a server automatically.
+"""
+import logging_config
+import passwords
+from app import app, db
+
+def reset_after_fork():
+    """Drop state a forked worker must not share with its parent.
+
+    Pooled database connections opened by the parent (e.g. while applying
+    migrations) must not be used by two processes, the log writer thread
+    does not survive the fork and the password pool belongs to the parent.
+    Job workers start on the worker's first request (``ensure_started``).
+    """
+    with app.app_context():
+        # close=False leaves the parent's connections alone and just forgets them
+        db.engine.dispose(close=False)
+    logging_config.restart_listener()
+    passwords.shutdown()